@@ -8,52 +8,72 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
-from src.data.loaders import read_network_csv
+from src.data.loaders import estimate_rates_from_records
+from src.data.cache import load_network_table
+from src.data.ingest import read_network_tables
 from src.analysis.statistics import (
-    group_counts_per_second,
+    counts_per_second_array,
     estimate_lambda_from_counts,
-    expand_counts_with_zeros,
     index_of_dispersion,
     interarrival_times,
     estimate_lambda_from_interarrivals,
-    poisson_pmf,
+    poisson_table,
     exponential_pdf,
-    contingency_protocol_size,
+    ContingencyCounts,
     poisson_anomaly_threshold,
 )
+from src.analysis.anomaly import StreamingAnomalyDetector
+from src.analysis.bootstrap import bootstrap_traffic
+from src.analysis.pyramid import load_count_pyramid
+from src.analysis.rate_profile import estimate_rate_profile
+from src.analysis.sketch import CaptureSketches
+from src.sim.analytical import solve as solve_analytical
+from src.sim.queue_mm1 import MM1Simulator
+from src.sim.replications import run_replications
 
 
 def main():
     ap = argparse.ArgumentParser(description="Análisis de tráfico: Poisson, Exponencial, Conjunta y Anomalías")
-    ap.add_argument("csv", type=str, help="Ruta al network_traffic.csv")
+    ap.add_argument("csv", type=str, help="Ruta al network_traffic.csv, o carpeta/glob con varias capturas (se unen ordenadas por tiempo)")
     ap.add_argument("--out", type=str, default="out", help="Carpeta de salida para gráficos")
     ap.add_argument("--jitter-seconds", type=float, default=0.0, help="Ruido uniforme [0,j]s para timestamps (ej: 60 si solo hay resolución de minutos)")
     ap.add_argument("--excel-table", action="store_true", help="Exporta tabla lista para Excel con frecuencias observadas y Poisson teórica")
     ap.add_argument("--excel-compact", action="store_true", help="Si se usa con --excel-table, exporta tabla adicional solo con k observados")
     ap.add_argument("--seconds-range", type=str, default=None, help="Rango de segundos a analizar, formato inicio-fin (ej: 1-7)")
+    ap.add_argument("--mm1", action="store_true", help="Métricas M/M/1 con λ y μ estimados del CSV (fórmula analítica; simula solo si ρ>=1)")
+    ap.add_argument("--mean-service-ms", type=float, default=None, help="Con --mm1, media de servicio en ms para estimar μ")
+    ap.add_argument("--simulate-seconds", type=float, default=None, help="Con --mm1, simula esta duración en lugar de usar la fórmula")
+    ap.add_argument("--replications", type=int, default=0, help="Con --mm1, además corre N réplicas independientes de la simulación con IC t-Student (queue_replications.csv)")
+    ap.add_argument("--precision", type=float, default=None, help="Con --replications, cada réplica se detiene al lograr este semiancho relativo en W, Wq y L (ej: 0.05)")
+    ap.add_argument("--cache-dir", type=str, default=None, help="Carpeta de la caché binaria del CSV (por defecto ~/.cache/redtrafficmodeling)")
+    ap.add_argument("--no-cache", action="store_true", help="Parsea siempre el CSV sin usar ni escribir la caché")
+    ap.add_argument("--rate-window", type=float, default=None, help="Exporta el perfil λ(t) por ventanas de esta duración en segundos (rate_profile.csv)")
+    ap.add_argument("--online-anomalies", choices=["ewma", "sliding"], default=None, help="Además, detección en línea con línea base EWMA o ventana deslizante (anomalies_online.csv)")
+    ap.add_argument("--no-interarrival-csv", action="store_true", help="No exporta todos los interarribos (interarrival_times.csv crece con la captura); los cuantiles van igual a distribution_quantiles.csv")
+    ap.add_argument("--workers", type=int, default=None, help="Procesos para leer varias capturas y para el bootstrap (por defecto, todos los núcleos)")
+    ap.add_argument("--bootstrap", type=int, default=0, help="Réplicas bootstrap para intervalos de confianza percentil y BCa de las métricas (bootstrap_intervals.csv)")
+    ap.add_argument("--bootstrap-seed", type=int, default=None, help="Semilla del bootstrap (reproducible)")
     args = ap.parse_args()
 
     outdir = Path(args.out)
     outdir.mkdir(parents=True, exist_ok=True)
 
     # Cargar datos
-    records = read_network_csv(args.csv)
-    ts_base = [r.timestamp.timestamp() for r in records]  # segundos epoch
+    if Path(args.csv).is_file():
+        table = load_network_table(args.csv, cache_dir=args.cache_dir, use_cache=not args.no_cache)
+    else:
+        table = read_network_tables(args.csv, workers=args.workers, use_cache=not args.no_cache,
+                                    cache_dir=args.cache_dir)
+    ts_base = table.timestamps  # segundos epoch
     if args.jitter_seconds and args.jitter_seconds > 0:
         rng = np.random.default_rng(12345)
         jitter = rng.uniform(0, args.jitter_seconds, size=len(ts_base))
-        ts = [tb + j for tb, j in zip(ts_base, jitter)]
+        ts = ts_base + jitter
     else:
         ts = ts_base
-    sizes = [r.packet_size for r in records]
-    protos = [r.protocol for r in records]
 
     # Fase 2.1: Discreta (Poisson)
-    counts_abs = group_counts_per_second(ts)
-    # Construir vector completo (rellenando ceros) y operar en segundos relativos [0..N]
-    counts_vector_full = expand_counts_with_zeros(counts_abs)
-    start_label = 0
-    end_label = len(counts_vector_full) - 1
+    s_ini = s_fin = None
     if args.seconds_range:
         try:
             # Interpretar como 1-based: 1-7 -> índices 0..6
@@ -62,21 +82,42 @@ def main():
             s_fin = s_fin_label - 1
         except Exception:
             raise ValueError("Formato de --seconds-range debe ser inicio-fin (1-based), ej: 1-7")
-        if s_ini < 0 or s_fin >= len(counts_vector_full) or s_ini > s_fin:
+    # Sin jitter, el rango de una captura se responde desde la pirámide de conteos
+    # cacheada (prefijos por segundo) sin contar toda la captura
+    pyr = None
+    if s_ini is not None and not args.jitter_seconds and Path(args.csv).is_file() and not args.no_cache:
+        pyr = load_count_pyramid(args.csv, cache_dir=args.cache_dir)
+        first_sec, total_secs = pyr.start, pyr.seconds
+    else:
+        first_sec, counts_per_sec = counts_per_second_array(ts)
+        total_secs = len(counts_per_sec)
+    # Operar en segundos relativos [0..N] (con ceros)
+    start_label = 0
+    end_label = total_secs - 1
+    if s_ini is not None:
+        if s_ini < 0 or s_fin >= total_secs or s_ini > s_fin:
             raise ValueError(
-                f"Rango inválido {s_ini_label}-{s_fin_label}. Debe estar dentro de 1-{len(counts_vector_full)} y ini<=fin.")
-        counts_vector = counts_vector_full[s_ini:s_fin + 1]
+                f"Rango inválido {s_ini_label}-{s_fin_label}. Debe estar dentro de 1-{total_secs} y ini<=fin.")
+        if pyr is not None:
+            st = pyr.query(s_ini, s_fin + 1, relative=True)
+            counts_vector = pyr.counts(s_ini, s_fin + 1, relative=True)[1].tolist()
+        else:
+            counts_vector = counts_per_sec[s_ini:s_fin + 1].tolist()
         # Diccionario etiquetado con segundos 1-based del rango solicitado
         counts_rel = {label: counts_vector[idx] for label, idx in zip(range(s_ini_label, s_fin_label + 1), range(0, len(counts_vector)))}
         start_label, end_label = s_ini_label, s_fin_label
     else:
-        counts_vector = counts_vector_full
+        counts_vector = counts_per_sec.tolist()
         counts_rel = {i: v for i, v in enumerate(counts_vector)}
 
-    lam_counts = (sum(counts_vector) / len(counts_vector)) if counts_vector else float('nan')
-    iod = index_of_dispersion(counts_vector)
+    if pyr is not None and st.windows > 1:
+        lam_counts, iod = st.lam, st.dispersion
+    else:
+        lam_counts = (sum(counts_vector) / len(counts_vector)) if counts_vector else float('nan')
+        iod = index_of_dispersion(np.asarray(counts_vector))
     xs = np.arange(0, (max(counts_rel.values()) + 5) if counts_rel else 10)
-    pmf = [poisson_pmf(int(k), lam_counts) if math.isfinite(lam_counts) else 0.0 for k in xs]
+    # Tabla Poisson en espacio log (memoizada por (lambda, k_max)), evaluada de una vez
+    pmf = poisson_table(lam_counts, int(xs[-1])).pmf if math.isfinite(lam_counts) else np.zeros(len(xs))
 
     # histograma de conteos por segundo
     obs = list(counts_rel.values())
@@ -107,11 +148,12 @@ def main():
         freq_emp = Counter(counts_vector)
         total_secs = len(counts_vector)
         rows = []
-        max_k = max(max(xs), max(freq_emp.keys()) if freq_emp else 0)
-        for k in range(0, int(max_k) + 1):
+        max_k = int(max(max(xs), max(freq_emp.keys()) if freq_emp else 0))
+        pmf_table = poisson_table(lam_counts, max_k).pmf if math.isfinite(lam_counts) else np.zeros(max_k + 1)
+        for k in range(0, max_k + 1):
             observed = freq_emp.get(k, 0)
             rel_freq = observed / total_secs if total_secs > 0 else 0.0
-            p_theory = poisson_pmf(k, lam_counts) if math.isfinite(lam_counts) else 0.0
+            p_theory = float(pmf_table[k])
             expected = p_theory * total_secs
             rows.append({
                 "k_paquetes_por_seg": k,
@@ -138,13 +180,13 @@ def main():
     deltas = interarrival_times(ts)
     lam_inter = estimate_lambda_from_interarrivals(deltas)
     # histograma y pdf exponencial
-    if deltas:
-        xs_cont = np.linspace(0, max(deltas), 100)
+    if len(deltas):
+        xs_cont = np.linspace(0, float(deltas.max()), 100)
     else:
         xs_cont = np.linspace(0, 1, 100)
-    pdf = [exponential_pdf(x, lam_inter) if math.isfinite(lam_inter) else 0.0 for x in xs_cont]
+    pdf = exponential_pdf(xs_cont, lam_inter) if math.isfinite(lam_inter) else np.zeros(len(xs_cont))
     plt.figure(figsize=(6,4))
-    if deltas:
+    if len(deltas):
         plt.hist(
             deltas,
             bins=30,
@@ -164,39 +206,27 @@ def main():
     plt.close()
 
     # Exportar interarribos y PDF teórica para Excel/validación
-    if deltas:
+    if len(deltas) and not args.no_interarrival_csv:
         pd.DataFrame({"interarribo_s": deltas}).to_csv(outdir / "interarrival_times.csv", index=False)
+    # Cuantiles de tamaño e interarribo con error relativo acotado (sketches de memoria fija)
+    sketches = CaptureSketches(alpha=0.01)
+    sketches.sizes.update(table.sizes)
+    sketches.interarrivals.update(deltas)
+    pd.DataFrame(sketches.summary()).to_csv(outdir / "distribution_quantiles.csv", index=False)
     pd.DataFrame({"t_s": xs_cont, "pdf_exponencial": pdf}).to_csv(outdir / "exponential_pdf_table.csv", index=False)
 
-    # Fase 2.3: Conjunta (Protocolo y Tamaño)
-    cont = contingency_protocol_size(protos, sizes, threshold=500)
+    # Fase 2.3: Conjunta (Protocolo y Tamaño), por conteos en una sola pasada
+    cont_counts = ContingencyCounts(size_edges=(500,))
+    cont_counts.update_table(table)
+    cont = cont_counts.summary(protocol=6, size_label='Grande')
     # Tabla en CSV (probabilidades presentes)
     rows = []
     for (prot, sizecat), prob in sorted(cont.table.items()):
         rows.append({"protocolo": prot, "tam_categoria": sizecat, "probabilidad": prob})
     pd.DataFrame(rows).to_csv(outdir / "contingency.csv", index=False)
 
-    # Tabla completa (4 combinaciones) con conteos y probabilidades
-    # Reconstruir categorías
-    def proto_name(p: int) -> str:
-        return 'TCP' if p == 6 else ('UDP' if p == 17 else str(p))
-    def size_cat(s: int) -> str:
-        return 'Pequeño' if s <= 500 else 'Grande'
-    pairs = [(proto_name(p), size_cat(s)) for p, s in zip(protos, sizes)]
-    from collections import Counter
-    c_pairs = Counter(pairs)
-    total_n = len(pairs)
-    combos = [('TCP','Pequeño'), ('TCP','Grande'), ('UDP','Pequeño'), ('UDP','Grande')]
-    rows_full = []
-    for prot, sc in combos:
-        count = c_pairs.get((prot, sc), 0)
-        prob = count / total_n if total_n > 0 else float('nan')
-        rows_full.append({
-            'protocolo': prot,
-            'tam_categoria': sc,
-            'conteo': count,
-            'probabilidad': prob
-        })
+    # Tabla completa (4 combinaciones) con conteos y probabilidades, de los mismos conteos
+    rows_full = cont_counts.rows(protocols=(6, 17))
     pd.DataFrame(rows_full).to_csv(outdir / "contingency_full.csv", index=False)
 
     # Resumen marginales y condicional
@@ -237,6 +267,14 @@ def main():
     anomalies = [(sec, cnt) for sec, cnt in counts_rel.items() if cnt > k_thresh]
     pd.DataFrame(anomalies, columns=["segundo", "paquetes_en_segundo"]).to_csv(outdir / "anomalies.csv", index=False)
 
+    # Detección en línea: λ de referencia móvil en lugar de uno global (tolera derivas)
+    if args.online_anomalies:
+        det = StreamingAnomalyDetector(mode=args.online_anomalies, z=3.0)
+        online = [(a.second - first_sec, a.count, a.baseline, a.threshold)
+                  for a in det.run([np.sort(ts)])]
+        pd.DataFrame(online, columns=["segundo", "paquetes_en_segundo", "lambda_base", "umbral_k"]).to_csv(
+            outdir / "anomalies_online.csv", index=False)
+
     # Figura de anomalías: barras de k(t) y línea horizontal del umbral
     try:
         secs = list(counts_rel.keys())
@@ -260,7 +298,7 @@ def main():
     ks_stat = float('nan')
     ks_pvalue = float('nan')
     try:
-        if deltas and math.isfinite(lam_inter) and lam_inter > 0:
+        if len(deltas) and math.isfinite(lam_inter) and lam_inter > 0:
             from scipy.stats import kstest, expon
             # Exponencial con loc=0 y scale=1/lambda
             ks = kstest(deltas, 'expon', args=(0, 1.0/lam_inter))
@@ -279,6 +317,68 @@ def main():
     }
     pd.DataFrame([summary]).to_csv(outdir / "summary_metrics.csv", index=False)
 
+    # Intervalos de confianza bootstrap (percentil y BCa) de las métricas principales
+    if args.bootstrap and args.bootstrap > 1:
+        intervals = bootstrap_traffic(counts_vector, deltas, table.protocols, table.sizes,
+                                      replicates=args.bootstrap, seed=args.bootstrap_seed,
+                                      workers=args.workers)
+        pd.DataFrame([
+            {"metrica": name, "estimacion": iv.estimate, "error_estandar": iv.std_error,
+             "ic_percentil_inf": iv.ci_low, "ic_percentil_sup": iv.ci_high,
+             "ic_bca_inf": iv.bca_low, "ic_bca_sup": iv.bca_high,
+             "replicas": iv.replicates, "confianza": iv.confidence}
+            for name, iv in intervals.items()
+        ]).to_csv(outdir / "bootstrap_intervals.csv", index=False)
+
+    # Perfil λ(t) por ventanas (tráfico no homogéneo), crudo y suavizado
+    if args.rate_window and args.rate_window > 0:
+        prof = estimate_rate_profile(ts_base, args.rate_window)
+        pd.DataFrame({
+            "inicio_ventana_s": prof.window_starts() - prof.start,
+            "paquetes": prof.counts,
+            "lambda": prof.rates,
+            "lambda_media_movil": prof.smoothed(5).rates,
+            "lambda_ewma": prof.ewma(0.3).rates,
+        }).to_csv(outdir / "rate_profile.csv", index=False)
+
+    # Cola M/M/1: primero la respuesta analítica, simulación solo si se pide o si ρ>=1
+    queue_res = None
+    queue_mode = None
+    if args.mm1:
+        lam_q, mu_q = estimate_rates_from_records(table, mean_service_time_ms=args.mean_service_ms)
+        if args.simulate_seconds is None:
+            queue_res = solve_analytical(lam_q, mu_q)
+            queue_mode = "analitico"
+        if queue_res is None:
+            sim_secs = args.simulate_seconds if args.simulate_seconds and args.simulate_seconds > 0 else 300.0
+            queue_res = MM1Simulator(lam_q, mu_q, seed=12345).run(duration=sim_secs, record_timeline=False)
+            queue_mode = "simulacion"
+        pd.DataFrame([{
+            "modo": queue_mode,
+            "lambda": lam_q,
+            "mu": mu_q,
+            "rho": queue_res.rho,
+            "Wq": queue_res.avg_wait_in_queue,
+            "W": queue_res.avg_time_in_system,
+            "L": queue_res.L_time_avg,
+            "Lq": queue_res.Lq_time_avg,
+        }]).to_csv(outdir / "queue_metrics.csv", index=False)
+        # Réplicas independientes (en paralelo), con parada secuencial opcional por precisión
+        if args.replications and args.replications > 1:
+            sim_secs = args.simulate_seconds if args.simulate_seconds and args.simulate_seconds > 0 else 300.0
+            reps = run_replications(lam_q, mu_q, args.replications, seed=12345, workers=args.workers,
+                                    duration=sim_secs, precision=args.precision, online_stats=True)
+            rows_rep = [
+                {"metrica": name, "media": m.mean, "varianza": m.variance, "ic_inf": m.ci_low,
+                 "ic_sup": m.ci_high, "replicas": m.n}
+                for name, m in reps.metrics.items()
+            ]
+            if reps.system_moments is not None:
+                rows_rep.append({"metrica": "W_por_cliente", "media": reps.system_moments.mean,
+                                 "varianza": reps.system_moments.variance, "ic_inf": float('nan'),
+                                 "ic_sup": float('nan'), "replicas": args.replications})
+            pd.DataFrame(rows_rep).to_csv(outdir / "queue_replications.csv", index=False)
+
     # Reporte breve en consola
     print("Fase 2.1 Poisson:")
     print(f"  lambda (por conteos) = {lam_counts:.6f}")
@@ -293,6 +393,11 @@ def main():
     print("Fase 3 Umbral de anomalia (3*sigma):")
     print(f"  Umbral k > {k_thresh} (con lambda={lam:.6f})")
     print(f"  Anomalías encontradas: {len(anomalies)}")
+    if queue_res is not None:
+        print(f"Cola M/M/1 ({queue_mode}):")
+        print(f"  rho = {queue_res.rho:.6f}")
+        print(f"  Wq = {queue_res.avg_wait_in_queue:.6f} s, W = {queue_res.avg_time_in_system:.6f} s")
+        print(f"  L = {queue_res.L_time_avg:.6f}, Lq = {queue_res.Lq_time_avg:.6f}")
 
 
 if __name__ == "__main__":
@@ -4,8 +4,10 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from typing import Optional
 
-from src.data.loaders import read_network_csv, estimate_rates_from_records
+from src.data.cache import load_network_table
+from src.data.loaders import RateEstimator, iter_network_csv
 from src.sim.queue_mm1 import MM1Simulator
+from src.sim.analytical import solve as solve_analytical
 
 
 class App(tk.Tk):
@@ -21,6 +23,8 @@ class App(tk.Tk):
         self.arrivals_cap_var = tk.StringVar(value="")
         self.mean_service_ms_var = tk.StringVar(value="")
         self.warmup_var = tk.StringVar(value="0")
+        self.analytical_var = tk.BooleanVar(value=True)
+        self.cache_var = tk.BooleanVar(value=True)
 
         self._build_ui()
 
@@ -35,6 +39,7 @@ class App(tk.Tk):
         self.file_entry = ttk.Entry(file_row)
         self.file_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         ttk.Button(file_row, text="Abrir...", command=self.on_open_file).pack(side=tk.LEFT)
+        ttk.Checkbutton(file_row, text="Caché binaria", variable=self.cache_var).pack(side=tk.LEFT, padx=5)
 
         # Params
         params = ttk.LabelFrame(frm, text="Parámetros")
@@ -53,13 +58,14 @@ class App(tk.Tk):
         self.duration_entry = add_param(2, "Duración sim (seg):", self.duration_var)
         self.arrivals_cap_entry = add_param(3, "Máx. llegadas (opcional):", self.arrivals_cap_var)
         self.mean_service_entry = add_param(4, "Media servicio ms (opcional):", self.mean_service_ms_var)
-        self.warmup_entry = add_param(5, "Warm-up (seg, opcional):", self.warmup_var)
+        self.warmup_entry = add_param(5, "Warm-up (seg o 'auto'):", self.warmup_var)
 
         # Buttons
         btns = ttk.Frame(frm)
         btns.pack(fill=tk.X, pady=10)
         ttk.Button(btns, text="Estim. parámetros desde CSV", command=self.on_estimate).pack(side=tk.LEFT)
         ttk.Button(btns, text="Simular", command=self.on_simulate).pack(side=tk.LEFT, padx=10)
+        ttk.Checkbutton(btns, text="Usar fórmulas analíticas si ρ<1", variable=self.analytical_var).pack(side=tk.LEFT)
 
         # Results
         res_frame = ttk.LabelFrame(frm, text="Resultados")
@@ -84,9 +90,16 @@ class App(tk.Tk):
             if not self.csv_path:
                 messagebox.showwarning("Falta CSV", "Selecciona un archivo CSV primero.")
                 return
-            records = read_network_csv(self.csv_path)
             ms = self._parse_float(self.mean_service_ms_var.get())
-            lam, mu = estimate_rates_from_records(records, mean_service_time_ms=ms)
+            est = RateEstimator()
+            if self.cache_var.get():
+                # Columnas binarias con memoria mapeada; el CSV solo se parsea si cambió
+                est.update_table(load_network_table(self.csv_path))
+            else:
+                # Lectura por bloques: memoria acotada aunque la captura sea enorme
+                for timestamps, sizes, _ in iter_network_csv(self.csv_path):
+                    est.update(timestamps, sizes)
+            lam, mu = est.rates(mean_service_time_ms=ms)
             self.lambda_var.set(f"{lam:.6f}")
             self.mu_var.set(f"{mu:.6f}")
             messagebox.showinfo("Estimación lista", f"Lambda ≈ {lam:.6f}, Mu ≈ {mu:.6f}")
@@ -99,21 +112,43 @@ class App(tk.Tk):
             mu = self._require_float(self.mu_var.get(), "Mu")
             duration = self._parse_float(self.duration_var.get())
             arrivals_cap = self._parse_int(self.arrivals_cap_var.get())
-            warmup = self._parse_float(self.warmup_var.get()) or 0.0
+            # 'auto' elige el warm-up con la regla MSER-5 durante la corrida
+            auto_warmup = self.warmup_var.get().strip().lower() == "auto"
+            warmup = 0.0 if auto_warmup else (self._parse_float(self.warmup_var.get()) or 0.0)
+
+            if self.analytical_var.get():
+                # Estado estable cerrado (instantáneo); si no existe (ρ>=1) se simula
+                res = solve_analytical(lam, mu)
+                if res is not None:
+                    self._show_results(res, analytical=True)
+                    return
 
             sim = MM1Simulator(lam, mu)
             res = sim.run(duration=duration if duration and duration > 0 else None,
                         max_arrivals=arrivals_cap if arrivals_cap and arrivals_cap > 0 else None,
                         record_timeline=True,
-                        warmup_time=warmup)
+                        warmup_time=warmup,
+                        auto_warmup=auto_warmup)
             self._show_results(res)
         except Exception as e:
             messagebox.showerror("Error en simulación", str(e))
 
-    def _show_results(self, res):
+    def _show_results(self, res, analytical: bool = False):
         self.text.delete("1.0", tk.END)
+        if analytical:
+            lines = [
+                "Resultado analítico M/M/1 (estado estable, sin simulación)",
+                f"Utilización (rho=λ/μ): {res.rho:.3f}",
+                f"Wq: {res.avg_wait_in_queue:.6f} s",
+                f"W: {res.avg_time_in_system:.6f} s",
+                f"L: {res.L_time_avg:.6f}",
+                f"Lq: {res.Lq_time_avg:.6f}",
+            ]
+            self.text.insert(tk.END, "\n".join(lines))
+            return
         lines = [
             f"Duración sim: {res.duration:.3f} s",
+            f"Warm-up aplicado: {res.warmup_time:.3f} s",
             f"Llegadas: {res.arrivals}",
             f"Salidas (atendidos): {res.departures}",
             f"Utilización teórica (rho=λ/μ): {res.rho:.3f}" if res.rho is not None else "rho teórico: N/A",
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import argparse
+import math
+import sys
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .statistics import poisson_anomaly_threshold
+
+
+@dataclass
+class Anomaly:
+    second: int       # segundo (epoch, entero) con exceso de llegadas
+    count: int        # paquetes en ese segundo
+    baseline: float   # λ de referencia (paquetes/s) antes de ese segundo
+    threshold: int    # umbral k: anomalía si count > threshold
+
+
+class StreamingAnomalyDetector:
+    """
+    Detector de anomalías en línea sobre cuentas por segundo.
+
+    Consume timestamps (s) en orden, de a uno (``update``) o por bloques
+    (``update_many``). Al cerrarse cada segundo compara su cuenta con el umbral
+    Poisson k > λ + z·sqrt(λ) (``poisson_anomaly_threshold``), donde λ es la línea
+    base de los segundos anteriores:
+
+    - ``mode='ewma'``: λ_t = alpha·k_t + (1 - alpha)·λ_{t-1}
+    - ``mode='sliding'``: media de los últimos ``window_seconds`` segundos, con un
+      buffer circular de cuentas y su suma corriente.
+
+    Cada paquete cuesta O(1) y la memoria es constante (``window_seconds`` cuentas).
+    Los segundos sin paquetes cuentan como 0; los saltos largos se resuelven en
+    O(min(salto, ventana)). No se avisa hasta haber visto ``warmup_seconds``
+    segundos. Un paquete con timestamp anterior al segundo en curso (desorden
+    leve) se cuenta en el segundo en curso y se registra en ``late``.
+    """
+
+    def __init__(self, mode: str = "ewma", alpha: float = 0.05, window_seconds: int = 60,
+                 z: float = 3.0, warmup_seconds: int = 10):
+        if mode not in ("ewma", "sliding"):
+            raise ValueError("mode debe ser 'ewma' o 'sliding'")
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha debe estar en (0, 1]")
+        if window_seconds < 1:
+            raise ValueError("window_seconds debe ser >= 1")
+        self.mode = mode
+        self.alpha = alpha
+        self.window_seconds = int(window_seconds)
+        self.z = z
+        self.warmup_seconds = int(warmup_seconds)
+        self._ring = [0] * self.window_seconds
+        self._pos = 0
+        self._ring_sum = 0
+        self._ewma = 0.0
+        self.seconds_seen = 0
+        self.current_second: Optional[int] = None
+        self.current_count = 0
+        self.packets = 0
+        self.late = 0
+        self.anomalies = 0
+
+    @property
+    def baseline(self) -> float:
+        """λ de referencia actual (paquetes/s) sobre los segundos ya cerrados."""
+        if self.seconds_seen == 0:
+            return float('nan')
+        if self.mode == "ewma":
+            return self._ewma
+        return self._ring_sum / min(self.seconds_seen, self.window_seconds)
+
+    def _push(self, count: int) -> None:
+        # Incorpora un segundo cerrado a la línea base
+        if self.mode == "ewma":
+            self._ewma = count if self.seconds_seen == 0 else self.alpha * count + (1.0 - self.alpha) * self._ewma
+        else:
+            self._ring_sum += count - self._ring[self._pos]
+            self._ring[self._pos] = count
+            self._pos = (self._pos + 1) % self.window_seconds
+        self.seconds_seen += 1
+
+    def _push_zeros(self, n: int) -> None:
+        if n <= 0:
+            return
+        if self.mode == "ewma":
+            if self.seconds_seen == 0:
+                self._push(0)
+                n -= 1
+            self._ewma *= (1.0 - self.alpha) ** n
+            self.seconds_seen += n
+        elif n >= self.window_seconds:
+            self._ring = [0] * self.window_seconds
+            self._ring_sum = 0
+            self._pos = 0
+            self.seconds_seen += n
+        else:
+            for _ in range(n):
+                self._push(0)
+
+    def _close(self) -> Optional[Anomaly]:
+        # Cierra current_second: evalúa contra la base previa y luego la actualiza
+        count = self.current_count
+        anomaly = None
+        if self.seconds_seen >= self.warmup_seconds:
+            lam = self.baseline
+            k = poisson_anomaly_threshold(lam, self.z)
+            if count > k:
+                anomaly = Anomaly(self.current_second, count, lam, k)
+                self.anomalies += 1
+        self._push(count)
+        return anomaly
+
+    def add_second(self, second: int, count: int) -> Optional[Anomaly]:
+        """Suma ``count`` paquetes al segundo ``second``; devuelve la anomalía del segundo que cierre, si la hay."""
+        self.packets += count
+        if self.current_second is None:
+            self.current_second = second
+            self.current_count = count
+            return None
+        if second <= self.current_second:
+            if second < self.current_second:
+                self.late += count
+            self.current_count += count
+            return None
+        anomaly = self._close()
+        self._push_zeros(second - self.current_second - 1)
+        self.current_second = second
+        self.current_count = count
+        return anomaly
+
+    def update(self, timestamp: float) -> Optional[Anomaly]:
+        """Un paquete; O(1) salvo al saltar varios segundos vacíos."""
+        second = math.floor(timestamp)
+        if second == self.current_second:
+            self.current_count += 1
+            self.packets += 1
+            return None
+        return self.add_second(second, 1)
+
+    def update_many(self, timestamps) -> List[Anomaly]:
+        """Un bloque de timestamps (en orden); trabajo de Python solo por segundo distinto."""
+        secs = np.floor(np.asarray(timestamps, dtype=np.float64)).astype(np.int64)
+        if secs.size == 0:
+            return []
+        starts = np.flatnonzero(np.diff(secs)) + 1
+        bounds = np.concatenate(([0], starts, [secs.size]))
+        out = []
+        for s, n in zip(secs[bounds[:-1]].tolist(), np.diff(bounds).tolist()):
+            a = self.add_second(s, n)
+            if a is not None:
+                out.append(a)
+        return out
+
+    def flush(self) -> Optional[Anomaly]:
+        """Cierra el segundo en curso (fin del flujo)."""
+        if self.current_second is None:
+            return None
+        anomaly = self._close()
+        self.current_second = None
+        self.current_count = 0
+        return anomaly
+
+    def run(self, batches: Iterable[np.ndarray]) -> Iterator[Anomaly]:
+        """Recorre bloques de timestamps y entrega las anomalías a medida que aparecen."""
+        for ts in batches:
+            yield from self.update_many(ts)
+        last = self.flush()
+        if last is not None:
+            yield last
+
+
+def _epoch_batches(stream, chunk_lines: int) -> Iterator[np.ndarray]:
+    while True:
+        lines = stream.readlines(chunk_lines * 16)
+        if not lines:
+            return
+        values = [x for x in (ln.strip() for ln in lines) if x]
+        if values:
+            yield np.array(values).astype(np.float64)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Detección de anomalías en línea sobre un flujo de paquetes (stdin)")
+    ap.add_argument("--format", choices=["csv", "epoch"], default="csv",
+                    help="csv: Timestamp,Packet_Size,Protocol con encabezado; epoch: un timestamp en segundos por línea")
+    ap.add_argument("--mode", choices=["ewma", "sliding"], default="ewma")
+    ap.add_argument("--alpha", type=float, default=0.05, help="Factor EWMA de la línea base")
+    ap.add_argument("--window", type=int, default=60, help="Ventana (s) de la línea base con --mode sliding")
+    ap.add_argument("--z", type=float, default=3.0, help="Umbral k > λ + z·sqrt(λ)")
+    ap.add_argument("--warmup", type=int, default=10, help="Segundos observados antes de emitir anomalías")
+    ap.add_argument("--chunk-rows", type=int, default=10_000, help="Filas por bloque leído de stdin")
+    args = ap.parse_args(argv)
+
+    det = StreamingAnomalyDetector(args.mode, args.alpha, args.window, args.z, args.warmup)
+    if args.format == "epoch":
+        batches: Iterable[np.ndarray] = _epoch_batches(sys.stdin.buffer, args.chunk_rows)
+    else:
+        from ..data.loaders import iter_network_csv
+
+        batches = (ts for ts, _, _ in iter_network_csv(sys.stdin.buffer, args.chunk_rows))
+    out = sys.stdout
+    out.write("segundo,paquetes,lambda_base,umbral\n")
+    for a in det.run(batches):
+        out.write(f"{a.second},{a.count},{a.baseline:.6f},{a.threshold}\n")
+        out.flush()
+    print(f"# paquetes={det.packets} segundos={det.seconds_seen} anomalias={det.anomalies} tardios={det.late}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
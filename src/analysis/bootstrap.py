@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Callable, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Estadístico sobre sumas suficientes: g(n, S) con S[:, j] = sum_i F[i, j]
+_Statistic = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+def _mean(n, s):
+    return s[:, 0] / n
+
+
+def _inverse_mean(n, s):
+    return n / s[:, 0]
+
+
+def _dispersion(n, s):
+    mean = s[:, 0] / n
+    var = (s[:, 1] - s[:, 0] * mean) / (n - 1)
+    return var / mean
+
+
+def _ratio(n, s):
+    return s[:, 0] / s[:, 1]
+
+
+@dataclass
+class BootstrapInterval:
+    estimate: float
+    std_error: float
+    ci_low: float      # percentil
+    ci_high: float
+    bca_low: float     # BCa (corregido por sesgo y aceleración)
+    bca_high: float
+    replicates: int
+    confidence: float
+
+
+@dataclass
+class _Classes:
+    """Datos agrupados en clases de valores: features por clase y frecuencia de cada una."""
+    features: np.ndarray  # (V, m)
+    freq: np.ndarray      # (V,) enteros
+
+    @property
+    def n(self) -> int:
+        return int(self.freq.sum())
+
+
+def _value_classes(values, max_classes: int, resolution: float, squares: bool) -> _Classes:
+    """
+    Clases de valores para remuestrear: los valores distintos si son a lo sumo
+    ``max_classes``; si no, buckets logarítmicos de ancho relativo ``resolution``
+    representados por la media exacta de sus valores (los ceros en su propia clase).
+    """
+    x = np.asarray(values, dtype=np.float64)
+    uniq, freq = np.unique(x, return_counts=True)
+    if uniq.size > max_classes:
+        pos = x > 0
+        idx = np.zeros(x.size, dtype=np.int64)
+        b = np.floor(np.log(x[pos]) / math.log1p(resolution)).astype(np.int64)
+        idx[pos] = b - b.min() + 1
+        freq = np.bincount(idx)
+        sums = np.bincount(idx, weights=x)
+        keep = freq > 0
+        freq, uniq = freq[keep], sums[keep] / freq[keep]
+    cols = [uniq, uniq * uniq] if squares else [uniq]
+    return _Classes(np.column_stack(cols), freq.astype(np.int64))
+
+
+def _replicate_chunk(args) -> np.ndarray:
+    features, freq, statistic, replicates, seed = args
+    rng = np.random.default_rng(seed)
+    n = int(freq.sum())
+    # Remuestrear n observaciones con reposición = pesos multinomiales por clase
+    weights = rng.multinomial(n, freq / n, size=replicates).astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return statistic(np.full(replicates, float(n)), weights @ features)
+
+
+def _jackknife(classes: _Classes, statistic: _Statistic) -> Tuple[np.ndarray, np.ndarray]:
+    # Quitar una observación de la clase v: mismas sumas menos sus features
+    total = classes.features.T @ classes.freq
+    s = total[None, :] - classes.features
+    with np.errstate(divide='ignore', invalid='ignore'):
+        theta = statistic(np.full(len(classes.freq), float(classes.n - 1)), s)
+    return theta, classes.freq
+
+
+def _interval(theta_hat: float, boot: np.ndarray, jack: Tuple[np.ndarray, np.ndarray],
+              confidence: float) -> BootstrapInterval:
+    boot = boot[np.isfinite(boot)]
+    B = boot.size
+    if B == 0 or not math.isfinite(theta_hat):
+        nan = float('nan')
+        return BootstrapInterval(theta_hat, nan, nan, nan, nan, nan, B, confidence)
+    alpha = 1.0 - confidence
+    lo_p, hi_p = np.quantile(boot, [alpha / 2, 1 - alpha / 2])
+    nd = NormalDist()
+    # Sesgo: proporción de réplicas por debajo del estimador (empates a la mitad)
+    prop = (np.count_nonzero(boot < theta_hat) + 0.5 * np.count_nonzero(boot == theta_hat)) / B
+    prop = min(max(prop, 0.5 / B), 1 - 0.5 / B)
+    z0 = nd.inv_cdf(prop)
+    theta_j, w = jack
+    ok = np.isfinite(theta_j)
+    theta_j, w = theta_j[ok], w[ok]
+    mean_j = float(np.average(theta_j, weights=w)) if w.sum() else theta_hat
+    d = mean_j - theta_j
+    den = 6.0 * float(np.sum(w * d ** 2)) ** 1.5
+    a = float(np.sum(w * d ** 3)) / den if den > 0 else 0.0
+    bounds = []
+    for q in (alpha / 2, 1 - alpha / 2):
+        z = nd.inv_cdf(q)
+        adj = nd.cdf(z0 + (z0 + z) / (1.0 - a * (z0 + z)))
+        bounds.append(float(np.quantile(boot, adj)))
+    return BootstrapInterval(theta_hat, float(boot.std(ddof=1)) if B > 1 else float('nan'),
+                             float(lo_p), float(hi_p), bounds[0], bounds[1], B, confidence)
+
+
+def bootstrap_classes(classes: _Classes, statistic: _Statistic, replicates: int = 10_000,
+                      confidence: float = 0.95, seed: Union[int, np.random.SeedSequence, None] = None,
+                      workers: Optional[int] = 1,
+                      chunk_size: int = 500) -> BootstrapInterval:
+    """
+    Bootstrap no paramétrico de ``statistic`` con intervalos percentil y BCa.
+
+    Cada réplica remuestrea las n observaciones con reposición; como solo importan
+    las clases de valores, se sortea directamente cuántas caen en cada clase
+    (multinomial) en matrices de ``chunk_size`` réplicas x clases, así la memoria
+    no depende de n. Los bloques se reparten en ``workers`` procesos con semillas
+    de ``SeedSequence(seed)``, por lo que el resultado no depende de ``workers``.
+    """
+    if replicates < 2:
+        raise ValueError("replicates debe ser >= 2")
+    if not 0 < confidence < 1:
+        raise ValueError("confidence debe estar en (0, 1)")
+    n = classes.n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        theta_hat = float(statistic(np.array([float(n)]), (classes.features.T @ classes.freq)[None, :])[0]) \
+            if n > 1 else float('nan')
+    if n < 2:
+        nan = float('nan')
+        return BootstrapInterval(theta_hat, nan, nan, nan, nan, nan, 0, confidence)
+    sizes = [chunk_size] * (replicates // chunk_size)
+    if replicates % chunk_size:
+        sizes.append(replicates % chunk_size)
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    seeds = root.spawn(len(sizes))
+    tasks = [(classes.features, classes.freq, statistic, b, s) for b, s in zip(sizes, seeds)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+    if workers == 1:
+        parts = [_replicate_chunk(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_replicate_chunk, tasks))
+    return _interval(theta_hat, np.concatenate(parts), _jackknife(classes, statistic), confidence)
+
+
+def bootstrap_traffic(counts_per_second: Sequence[int], interarrivals: Sequence[float],
+                      protocols: Sequence[int], sizes: Sequence[int], replicates: int = 10_000,
+                      confidence: float = 0.95, seed: Optional[int] = None,
+                      workers: Optional[int] = None, threshold: int = 500, tcp: int = 6,
+                      max_classes: int = 8192, resolution: float = 1e-3,
+                      chunk_size: int = 500) -> Dict[str, BootstrapInterval]:
+    """
+    Intervalos bootstrap (percentil y BCa) de las métricas de ``summary_metrics.csv``:
+
+    - ``lambda_conteos`` e ``indice_dispersion``: remuestreo del vector de cuentas por segundo.
+    - ``lambda_interarribos``: remuestreo de los interarribos (1 / media).
+    - ``P_Grande_dado_TCP``: remuestreo de paquetes (categorías TCP-Grande, TCP-Pequeño, otro).
+
+    Los interarribos con más de ``max_classes`` valores distintos se agrupan en
+    buckets logarítmicos de ancho relativo ``resolution`` (0.1%) con su media
+    exacta, lo que mantiene el costo por réplica acotado para capturas enormes.
+    """
+    counts = _value_classes(counts_per_second, max_classes, resolution, squares=True)
+    deltas = _value_classes(interarrivals, max_classes, resolution, squares=False)
+    protocols = np.asarray(protocols)
+    sizes = np.asarray(sizes)
+    is_tcp = protocols == tcp
+    big = sizes > threshold
+    cats = _Classes(np.array([[1.0, 1.0], [0.0, 1.0], [0.0, 0.0]]),
+                    np.array([np.count_nonzero(is_tcp & big), np.count_nonzero(is_tcp & ~big),
+                              np.count_nonzero(~is_tcp)], dtype=np.int64))
+    common = dict(replicates=replicates, confidence=confidence, workers=workers, chunk_size=chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(4)
+    return {
+        "lambda_conteos": bootstrap_classes(counts, _mean, seed=seeds[0], **common),
+        "lambda_interarribos": bootstrap_classes(deltas, _inverse_mean, seed=seeds[1], **common),
+        "indice_dispersion": bootstrap_classes(counts, _dispersion, seed=seeds[2], **common),
+        "P_Grande_dado_TCP": bootstrap_classes(cats, _ratio, seed=seeds[3], **common),
+    }
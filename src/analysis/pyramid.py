@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..data.cache import DEFAULT_CACHE_DIR, _entry_dir, _read_manifest, load_network_table
+from ..data.loaders import read_network_table
+from ..data.table import TrafficTable
+from .statistics import poisson_anomaly_threshold
+
+# Anchos de nivel en segundos: 1 s, 10 s, 1 min, 1 h
+DEFAULT_LEVELS = (1, 10, 60, 3600)
+
+# Se incrementa si cambia el formato de los archivos
+PYRAMID_VERSION = 1
+
+_MANIFEST_FILE = "pyramid.json"
+# Arreglo -> (extensión, dtype little-endian en disco)
+_ARRAYS = {
+    "counts": ("counts.i8", "<i8"),
+    "bytes": ("bytes.i8", "<i8"),
+    "squares": ("squares.f8", "<f8"),
+    "protocols": ("protocols.i8", "<i8"),
+}
+
+
+@dataclass
+class RangeStats:
+    start: float                # inicio del rango (epoch, s), recortado a la captura
+    end: float                  # fin (exclusivo)
+    resolution: int             # ancho de ventana (s) para la dispersión
+    packets: int
+    bytes: int
+    per_protocol: Dict[int, int]
+    lam: float                  # paquetes/s sobre todo el rango
+    windows: int                # ventanas completas de ``resolution`` dentro del rango
+    mean_count: float           # media de paquetes por ventana
+    variance: float             # varianza muestral (ddof=1) de paquetes por ventana
+    dispersion: float           # variance / mean_count
+
+
+class _Level:
+    """Un nivel: ventanas de ``width`` s alineadas a múltiplos de ``width`` desde ``start``,
+    guardadas como sumas prefijas (longitud ventanas + 1)."""
+
+    __slots__ = ("width", "start", "counts", "bytes", "squares", "protocols")
+
+    def __init__(self, width: int, start: int, counts, bytes_, squares, protocols):
+        self.width = int(width)
+        self.start = int(start)
+        self.counts = counts
+        self.bytes = bytes_
+        self.squares = squares
+        self.protocols = protocols
+
+    def __len__(self) -> int:
+        return len(self.counts) - 1
+
+    def window_counts(self, i0: int, i1: int, step: int = 1) -> np.ndarray:
+        """Paquetes por ventana de ``step`` ventanas del nivel, desde la ventana i0 hasta i1."""
+        c = np.asarray(self.counts[i0:i1 + 1:step])
+        return np.diff(c)
+
+
+class CountPyramid:
+    """
+    Pirámide de conteos multirresolución de una captura.
+
+    Cada nivel (por defecto 1 s, 10 s, 60 s y 1 h) guarda, por ventana alineada a
+    múltiplos de su ancho, sumas prefijas de paquetes, bytes, cuadrados de las
+    cuentas y paquetes por protocolo. Así paquetes, bytes, λ y dispersión de
+    cualquier rango salen en O(1) por nivel sin tocar los paquetes; las ventanas
+    de resoluciones que no son un nivel se arman con un paso sobre el nivel más
+    grueso que las divide.
+
+    Se construye una vez con ``from_table`` y se persiste con ``save`` (un archivo
+    crudo little-endian por arreglo y un manifiesto JSON) para abrirla con memoria
+    mapeada (``load``). Los cuadrados se acumulan en float64 para no desbordar
+    en capturas largas.
+    """
+
+    def __init__(self, start: int, seconds: int, levels: Dict[int, _Level], protocols: Sequence[int]):
+        self.start = int(start)        # primer segundo (epoch) de la captura
+        self.seconds = int(seconds)    # segundos cubiertos: [start, start + seconds)
+        self.levels = levels
+        self.protocols = [int(p) for p in protocols]
+
+    @property
+    def end(self) -> int:
+        return self.start + self.seconds
+
+    @property
+    def widths(self) -> List[int]:
+        return sorted(self.levels)
+
+    # -- construcción ---------------------------------------------------------------
+
+    @classmethod
+    def from_arrays(cls, timestamps, sizes, protocols, levels: Sequence[int] = DEFAULT_LEVELS,
+                    chunk_rows: int = 1_000_000) -> "CountPyramid":
+        """Desde columnas (timestamps epoch en s, tamaños, protocolos), por bloques de ``chunk_rows``."""
+        return cls.from_table(TrafficTable(timestamps, sizes, protocols), levels, chunk_rows)
+
+    @classmethod
+    def from_table(cls, table: TrafficTable, levels: Sequence[int] = DEFAULT_LEVELS,
+                   chunk_rows: int = 1_000_000) -> "CountPyramid":
+        """
+        Desde una ``TrafficTable`` (en cualquier orden; admite columnas con memoria
+        mapeada). Cuenta por segundo con ``np.bincount`` bloque a bloque y agrega
+        los niveles gruesos desde el de 1 s.
+        """
+        widths = sorted({int(w) for w in levels} | {1})
+        if widths[0] < 1:
+            raise ValueError("Los niveles deben ser anchos enteros >= 1 s")
+        n = len(table)
+        if n == 0:
+            return cls._from_seconds(0, np.zeros(0, np.int64), np.zeros(0, np.int64), {}, widths)
+        ts = table.timestamps
+        lo, hi = (float(ts[0]), float(ts[-1])) if table.is_sorted else (float(np.min(ts)), float(np.max(ts)))
+        first = math.floor(lo)
+        seconds = math.floor(hi) - first + 1
+        counts = np.zeros(seconds, dtype=np.int64)
+        bytes_ = np.zeros(seconds, dtype=np.int64)
+        per_proto: Dict[int, np.ndarray] = {}
+        for i in range(0, n, chunk_rows):
+            part = table[i:i + chunk_rows]
+            sec = (np.floor(np.asarray(part.timestamps, dtype=np.float64)) - first).astype(np.int64)
+            c = np.bincount(sec)
+            counts[:c.size] += c
+            b = np.bincount(sec, weights=np.asarray(part.sizes, dtype=np.float64))
+            bytes_[:b.size] += np.rint(b).astype(np.int64)
+            protos = np.asarray(part.protocols)
+            for p in np.unique(protos).tolist():
+                pc = np.bincount(sec[protos == p])
+                acc = per_proto.setdefault(int(p), np.zeros(seconds, dtype=np.int64))
+                acc[:pc.size] += pc
+        return cls._from_seconds(first, counts, bytes_, per_proto, widths)
+
+    @classmethod
+    def _from_seconds(cls, first: int, counts: np.ndarray, bytes_: np.ndarray,
+                      per_proto: Dict[int, np.ndarray], widths: Sequence[int]) -> "CountPyramid":
+        protocols = sorted(per_proto)
+        proto = (np.column_stack([per_proto[p] for p in protocols]) if protocols
+                 else np.zeros((counts.size, 0), dtype=np.int64))
+        levels = {}
+        for w in widths:
+            start = (first // w) * w
+            offset = first - start
+            nwin = -(-(offset + counts.size) // w) if counts.size else 0
+
+            def windows(x):
+                pad = np.zeros((nwin * w,) + x.shape[1:], dtype=x.dtype)
+                pad[offset:offset + x.shape[0]] = x
+                return pad.reshape((nwin, w) + x.shape[1:]).sum(axis=1)
+
+            wc, wb, wp = windows(counts), windows(bytes_), windows(proto)
+            levels[w] = _Level(
+                w, start,
+                np.concatenate(([0], np.cumsum(wc))).astype(np.int64),
+                np.concatenate(([0], np.cumsum(wb))).astype(np.int64),
+                np.concatenate(([0.0], np.cumsum(wc.astype(np.float64) ** 2))),
+                np.vstack((np.zeros((1, len(protocols)), dtype=np.int64), np.cumsum(wp, axis=0))).astype(np.int64),
+            )
+        return cls(first, counts.size, levels, protocols)
+
+    # -- persistencia ---------------------------------------------------------------
+
+    def save(self, directory: Union[str, Path]) -> Path:
+        """
+        Escribe la pirámide en ``directory`` (se reemplaza entera: se escribe en una
+        carpeta temporal hermana y se renombra).
+        """
+        directory = Path(directory)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=directory.parent, prefix=directory.name + ".", suffix=".tmp"))
+        try:
+            for w, lev in self.levels.items():
+                for name, (ext, dtype) in _ARRAYS.items():
+                    np.ascontiguousarray(getattr(lev, name), dtype=dtype).tofile(tmp / f"L{w}.{ext}")
+            manifest = {
+                "version": PYRAMID_VERSION, "start": self.start, "seconds": self.seconds,
+                "protocols": self.protocols,
+                "levels": [{"width": w, "start": lev.start, "windows": len(lev)}
+                           for w, lev in sorted(self.levels.items())],
+            }
+            (tmp / _MANIFEST_FILE).write_text(json.dumps(manifest), encoding='utf-8')
+            if directory.exists():
+                shutil.rmtree(directory, ignore_errors=True)
+            os.replace(tmp, directory)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return directory
+
+    @classmethod
+    def load(cls, directory: Union[str, Path], mmap: bool = True) -> "CountPyramid":
+        """Abre una pirámide guardada con ``save`` (ValueError si falta o es de otra versión)."""
+        directory = Path(directory)
+        try:
+            manifest = json.loads((directory / _MANIFEST_FILE).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            raise ValueError(f"No hay pirámide válida en {directory}") from None
+        if manifest.get("version") != PYRAMID_VERSION:
+            raise ValueError(f"Versión de pirámide no soportada en {directory}")
+        n_proto = len(manifest["protocols"])
+        levels = {}
+        for spec in manifest["levels"]:
+            w, nwin = int(spec["width"]), int(spec["windows"])
+            arrays = {}
+            for name, (ext, dtype) in _ARRAYS.items():
+                shape = (nwin + 1, n_proto) if name == "protocols" else (nwin + 1,)
+                file = directory / f"L{w}.{ext}"
+                if mmap and math.prod(shape):
+                    arrays[name] = np.memmap(file, dtype=dtype, mode='r', shape=shape)
+                else:
+                    arrays[name] = np.fromfile(file, dtype=dtype).reshape(shape)
+            levels[w] = _Level(w, spec["start"], arrays["counts"], arrays["bytes"],
+                               arrays["squares"], arrays["protocols"])
+        return cls(manifest["start"], manifest["seconds"], levels, manifest["protocols"])
+
+    # -- consultas ------------------------------------------------------------------
+
+    def _clip(self, t0: Optional[float], t1: Optional[float], relative: bool) -> Tuple[int, int]:
+        # Rango en segundos enteros epoch [s0, s1), recortado a la captura
+        base = self.start if relative else 0
+        s0 = self.start if t0 is None else math.floor(base + t0)
+        s1 = self.end if t1 is None else math.ceil(base + t1)
+        s0, s1 = max(s0, self.start), min(s1, self.end)
+        return s0, max(s0, s1)
+
+    def _level_for(self, resolution: int) -> _Level:
+        # Nivel más grueso cuyo ancho divide la resolución pedida
+        widths = [w for w in self.levels if resolution % w == 0]
+        if not widths:
+            raise ValueError(f"resolution debe ser múltiplo de algún nivel {self.widths}")
+        return self.levels[max(widths)]
+
+    def _windows(self, s0: int, s1: int, resolution: int) -> Tuple[_Level, int, int, int]:
+        # Ventanas completas de ``resolution`` s (alineadas a múltiplos) dentro de [s0, s1)
+        lev = self._level_for(resolution)
+        step = resolution // lev.width
+        a = -(-s0 // resolution) * resolution
+        b = (s1 // resolution) * resolution
+        if b <= a:
+            return lev, 0, 0, step
+        return lev, (a - lev.start) // lev.width, (b - lev.start) // lev.width, step
+
+    def query(self, t0: Optional[float] = None, t1: Optional[float] = None, resolution: int = 1,
+              relative: bool = False) -> RangeStats:
+        """
+        Métricas del rango [t0, t1) (epoch en s, o segundos desde ``start`` con
+        ``relative=True``; None = borde de la captura). Paquetes, bytes, protocolos
+        y λ son exactos al segundo; media, varianza y dispersión son de las ventanas
+        completas de ``resolution`` s dentro del rango. O(1) si ``resolution`` es un
+        nivel; si no, O(ventanas).
+        """
+        s0, s1 = self._clip(t0, t1, relative)
+        one = self.levels[1]
+        i0, i1 = s0 - one.start, s1 - one.start
+        packets = int(one.counts[i1] - one.counts[i0])
+        total_bytes = int(one.bytes[i1] - one.bytes[i0])
+        proto = np.asarray(one.protocols[i1]) - np.asarray(one.protocols[i0])
+        per_protocol = {p: int(c) for p, c in zip(self.protocols, proto.tolist())}
+        duration = s1 - s0
+        lam = packets / duration if duration else float('nan')
+
+        lev, w0, w1, step = self._windows(s0, s1, resolution)
+        nwin = (w1 - w0) // step
+        if nwin == 0:
+            mean = var = float('nan')
+        else:
+            s = float(lev.counts[w1] - lev.counts[w0])
+            if step == 1:
+                sq = float(lev.squares[w1] - lev.squares[w0])
+            else:
+                wc = lev.window_counts(w0, w1, step).astype(np.float64)
+                sq = float(np.dot(wc, wc))
+            mean = s / nwin
+            var = (sq - s * mean) / (nwin - 1) if nwin > 1 else float('nan')
+        disp = var / mean if nwin > 1 and mean > 0 else float('nan')
+        return RangeStats(float(s0), float(s1), int(resolution), packets, total_bytes, per_protocol,
+                          lam, nwin, mean, var, disp)
+
+    def counts(self, t0: Optional[float] = None, t1: Optional[float] = None, resolution: int = 1,
+               relative: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """(inicio de cada ventana epoch, paquetes por ventana) de las ventanas completas del rango."""
+        s0, s1 = self._clip(t0, t1, relative)
+        lev, w0, w1, step = self._windows(s0, s1, resolution)
+        if w1 <= w0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        c = lev.window_counts(w0, w1, step)
+        starts = lev.start + lev.width * w0 + resolution * np.arange(c.size, dtype=np.int64)
+        return starts, c
+
+    def anomalies(self, t0: Optional[float] = None, t1: Optional[float] = None, resolution: int = 1,
+                  z: float = 3.0, relative: bool = False) -> Tuple[int, np.ndarray, np.ndarray]:
+        """
+        Umbral k (``poisson_anomaly_threshold`` sobre la media por ventana del rango)
+        y las ventanas con más de k paquetes: (k, inicios, cuentas).
+        """
+        st = self.query(t0, t1, resolution, relative)
+        if st.windows == 0:
+            return 0, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        k = poisson_anomaly_threshold(st.mean_count, z)
+        starts, c = self.counts(st.start, st.end, resolution)
+        hot = c > k
+        return k, starts[hot], c[hot]
+
+
+def load_count_pyramid(path: Union[str, Path], cache_dir: Union[str, Path, None] = None,
+                       use_cache: bool = True, levels: Sequence[int] = DEFAULT_LEVELS,
+                       mmap: bool = True) -> CountPyramid:
+    """
+    Pirámide de una captura CSV, construida una sola vez y guardada junto a su
+    entrada de la caché binaria (``load_network_table``), con el hash del contenido
+    en el nombre: mientras el CSV no cambie se abre con memoria mapeada sin leer
+    paquetes. Con ``use_cache=False`` se construye en memoria desde el CSV.
+    """
+    path = Path(path).resolve()
+    if not use_cache:
+        return CountPyramid.from_table(read_network_table(str(path)), levels)
+    table = load_network_table(path, cache_dir=cache_dir)
+    entry = _entry_dir(path, Path(cache_dir) if cache_dir is not None else DEFAULT_CACHE_DIR)
+    manifest = _read_manifest(entry)
+    target = entry / f"pyramid-{manifest['blake2b']}"
+    widths = sorted({int(w) for w in levels} | {1})
+    try:
+        pyr = CountPyramid.load(target, mmap)
+        if pyr.widths == widths:
+            return pyr
+    except ValueError:
+        pass
+    pyr = CountPyramid.from_table(table, widths)
+    pyr.save(target)
+    # Pirámides de versiones anteriores del CSV
+    for old in entry.glob("pyramid-*"):
+        if old != target and old.is_dir() and not old.name.endswith(".tmp"):
+            shutil.rmtree(old, ignore_errors=True)
+    return CountPyramid.load(target, mmap)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Consultas por rango y resolución sobre la pirámide de conteos de una captura")
+    ap.add_argument("csv", type=str, help="Ruta al CSV de la captura")
+    ap.add_argument("--seconds-range", type=str, default=None,
+                    help="Rango de segundos relativos, formato inicio-fin 1-based como en analysis_cli.py (ej: 1-7)")
+    ap.add_argument("--resolution", type=int, default=1, help="Ancho de ventana (s) para dispersión y anomalías")
+    ap.add_argument("--z", type=float, default=3.0, help="Umbral de anomalía k > λ + z·sqrt(λ) por ventana")
+    ap.add_argument("--cache-dir", type=str, default=None, help="Carpeta de la caché binaria")
+    ap.add_argument("--no-cache", action="store_true", help="Construye la pirámide en memoria sin persistirla")
+    args = ap.parse_args(argv)
+
+    pyr = load_count_pyramid(args.csv, cache_dir=args.cache_dir, use_cache=not args.no_cache)
+    t0 = t1 = None
+    if args.seconds_range:
+        try:
+            ini, fin = map(int, args.seconds_range.split('-'))
+        except ValueError:
+            raise ValueError("Formato de --seconds-range debe ser inicio-fin (1-based), ej: 1-7") from None
+        t0, t1 = ini - 1, fin
+    st = pyr.query(t0, t1, args.resolution, relative=True)
+    print(f"rango_s={st.start - pyr.start:g}-{st.end - pyr.start:g} paquetes={st.packets} bytes={st.bytes} "
+          f"lambda={st.lam:.6f}")
+    print(f"resolucion_s={st.resolution} ventanas={st.windows} media={st.mean_count:.6f} "
+          f"varianza={st.variance:.6f} indice_dispersion={st.dispersion:.6f}")
+    print("protocolos=" + ",".join(f"{p}:{c}" for p, c in st.per_protocol.items()))
+    k, starts, counts = pyr.anomalies(st.start, st.end, args.resolution, args.z)
+    print(f"umbral_anomalia_k={k} anomalias={len(counts)}")
+    for s, c in zip(starts.tolist(), counts.tolist()):
+        print(f"{s - pyr.start},{c}")
+
+
+if __name__ == "__main__":
+    main()
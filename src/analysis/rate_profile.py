@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..data.table import TrafficTable
+
+
+@dataclass
+class RateProfile:
+    """
+    Perfil λ(t) constante por tramos: ``counts[i]`` llegadas en la ventana
+    [start + i*window_seconds, start + (i+1)*window_seconds).
+
+    ``rates`` es la tasa (llegadas/s) de cada ventana, ya suavizada si el perfil
+    viene de ``smoothed``/``ewma``; ``counts`` siempre guarda las cuentas crudas.
+    """
+    start: float
+    window_seconds: float
+    counts: np.ndarray
+    rates: np.ndarray
+
+    @classmethod
+    def from_counts(cls, counts: Sequence[int], window_seconds: float, start: float = 0.0) -> "RateProfile":
+        counts = np.asarray(counts, dtype=np.int64)
+        return cls(float(start), float(window_seconds), counts, counts / float(window_seconds))
+
+    @classmethod
+    def from_buckets(cls, buckets: Dict[int, int], bucket_seconds: int = 1,
+                     window_seconds: Optional[int] = None) -> "RateProfile":
+        """
+        Desde cuentas ya agrupadas (p.ej. ``group_counts_per_second``: segundo -> cuenta),
+        reagrupadas en ventanas de ``window_seconds`` (múltiplo de ``bucket_seconds``).
+        """
+        window_seconds = window_seconds or bucket_seconds
+        if window_seconds % bucket_seconds:
+            raise ValueError("window_seconds debe ser múltiplo de bucket_seconds")
+        if not buckets:
+            return cls.from_counts([], window_seconds)
+        keys = np.fromiter(buckets.keys(), dtype=np.int64, count=len(buckets))
+        vals = np.fromiter(buckets.values(), dtype=np.int64, count=len(buckets))
+        per = window_seconds // bucket_seconds
+        # Ventanas alineadas a múltiplos de window_seconds, como RateProfileEstimator
+        first = int(keys.min()) // per
+        counts = np.bincount(keys // per - first, weights=vals).astype(np.int64)
+        return cls.from_counts(counts, window_seconds, start=first * window_seconds)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    @property
+    def duration(self) -> float:
+        return len(self.counts) * self.window_seconds
+
+    @property
+    def mean_rate(self) -> float:
+        """Tasa media del perfil (equivale al λ único de todo el período)."""
+        return float(self.counts.sum()) / self.duration if len(self) else float('nan')
+
+    @property
+    def max_rate(self) -> float:
+        return float(self.rates.max()) if len(self) else 0.0
+
+    def window_starts(self) -> np.ndarray:
+        return self.start + self.window_seconds * np.arange(len(self))
+
+    def rate_at(self, t, relative: bool = True):
+        """
+        λ(t) del perfil; ``t`` en segundos desde el inicio del perfil (o epoch con
+        ``relative=False``). Acepta escalares o arreglos; fuera del perfil vale 0.
+        """
+        t = np.asarray(t, dtype=np.float64)
+        if not relative:
+            t = t - self.start
+        idx = np.floor(t / self.window_seconds).astype(np.int64)
+        inside = (idx >= 0) & (idx < len(self))
+        out = np.where(inside, self.rates[np.clip(idx, 0, max(0, len(self) - 1))] if len(self) else 0.0, 0.0)
+        return float(out) if out.ndim == 0 else out
+
+    def smoothed(self, width: int) -> "RateProfile":
+        """Media móvil centrada de ``width`` ventanas (en los bordes, sobre las disponibles)."""
+        if width < 1:
+            raise ValueError("width debe ser >= 1")
+        r = self.counts / self.window_seconds
+        c = np.concatenate(([0.0], np.cumsum(r)))
+        i = np.arange(len(r))
+        lo = np.clip(i - (width - 1) // 2, 0, len(r))
+        hi = np.clip(i + width // 2 + 1, 0, len(r))
+        return RateProfile(self.start, self.window_seconds, self.counts, (c[hi] - c[lo]) / (hi - lo))
+
+    def ewma(self, alpha: float) -> "RateProfile":
+        """Suavizado exponencial: s_i = alpha*r_i + (1-alpha)*s_{i-1}, con s_0 = r_0."""
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha debe estar en (0, 1]")
+        r = self.counts / self.window_seconds
+        s = np.empty_like(r)
+        acc = r[0] if len(r) else 0.0
+        for i, x in enumerate(r.tolist()):
+            acc = alpha * x + (1.0 - alpha) * acc
+            s[i] = acc
+        return RateProfile(self.start, self.window_seconds, self.counts, s)
+
+    def peak(self, span_seconds: float) -> Tuple[float, float]:
+        """
+        Intervalo (inicio, fin), en segundos relativos al perfil, de ``span_seconds``
+        (redondeado a ventanas enteras) con más llegadas, p.ej. la hora pico.
+        """
+        k = max(1, min(len(self), int(math.ceil(span_seconds / self.window_seconds))))
+        if not len(self):
+            return 0.0, 0.0
+        c = np.concatenate(([0], np.cumsum(self.counts)))
+        i = int(np.argmax(c[k:] - c[:-k]))
+        return i * self.window_seconds, (i + k) * self.window_seconds
+
+
+class RateProfileEstimator:
+    """
+    Estimador incremental de λ(t): cuenta llegadas por ventana de ``window_seconds``
+    con ``np.bincount`` sobre cada bloque (una pasada lineal, sin ordenar), así que
+    admite datos en cualquier orden y alimentado bloque a bloque (``iter_network_csv``).
+
+    Las ventanas se alinean a ``origin`` (por defecto, el primer timestamp visto
+    redondeado hacia abajo a la ventana); llegadas anteriores extienden el perfil
+    hacia atrás.
+    """
+
+    def __init__(self, window_seconds: float = 60.0, origin: Optional[float] = None):
+        if window_seconds <= 0:
+            raise ValueError("window_seconds debe ser > 0")
+        self.window_seconds = float(window_seconds)
+        self.origin = origin
+        self._first = 0  # índice de ventana (relativo a origin) de counts[0]
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def update(self, timestamps) -> None:
+        ts = np.asarray(timestamps, dtype=np.float64)
+        if ts.size == 0:
+            return
+        if self.origin is None:
+            self.origin = math.floor(float(ts.min()) / self.window_seconds) * self.window_seconds
+        idx = np.floor((ts - self.origin) / self.window_seconds).astype(np.int64)
+        lo = min(int(idx.min()), self._first) if self.counts.size else int(idx.min())
+        if self.counts.size and lo < self._first:
+            self.counts = np.concatenate((np.zeros(self._first - lo, dtype=np.int64), self.counts))
+        self._first = lo
+        binned = np.bincount(idx - lo)
+        if binned.size > self.counts.size:
+            self.counts = np.concatenate((self.counts, np.zeros(binned.size - self.counts.size, dtype=np.int64)))
+        self.counts[:binned.size] += binned
+
+    def update_table(self, table: TrafficTable) -> None:
+        self.update(table.timestamps)
+
+    def profile(self) -> RateProfile:
+        start = (self.origin or 0.0) + self._first * self.window_seconds
+        return RateProfile.from_counts(self.counts.copy(), self.window_seconds, start)
+
+
+def estimate_rate_profile(data: Union[Sequence[float], TrafficTable], window_seconds: float = 60.0,
+                          smoothing: Optional[str] = None, width: int = 5,
+                          alpha: float = 0.3) -> RateProfile:
+    """
+    Perfil λ(t) por ventanas de ``window_seconds`` a partir de timestamps (s) o una
+    ``TrafficTable``. ``smoothing``: None, 'sliding' (media móvil de ``width``
+    ventanas) o 'ewma' (factor ``alpha``).
+    """
+    est = RateProfileEstimator(window_seconds)
+    est.update(data.timestamps if isinstance(data, TrafficTable) else data)
+    prof = est.profile()
+    if smoothing is None:
+        return prof
+    if smoothing == 'sliding':
+        return prof.smoothed(width)
+    if smoothing == 'ewma':
+        return prof.ewma(alpha)
+    raise ValueError("smoothing debe ser None, 'sliding' o 'ewma'")
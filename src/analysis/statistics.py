@@ -1,15 +1,43 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from collections import Counter
+from functools import lru_cache
 import math
 
+import numpy as np
 
-def group_counts_per_second(timestamps_sec: List[float]) -> Dict[int, int]:
+from ..data.table import TrafficTable
+
+
+def _timestamps_of(data: Union[Sequence[float], TrafficTable]) -> Sequence[float]:
+    """Acepta una secuencia de timestamps (s) o una TrafficTable."""
+    return data.timestamps if isinstance(data, TrafficTable) else data
+
+
+def counts_per_second_array(timestamps_sec: Union[Sequence[float], TrafficTable]) -> Tuple[int, np.ndarray]:
+    """
+    Variante NumPy de group_counts_per_second + expand_counts_with_zeros: devuelve
+    (primer segundo, cuentas por segundo con ceros) usando np.bincount.
+    """
+    ts = np.asarray(_timestamps_of(timestamps_sec), dtype=np.float64)
+    if ts.size == 0:
+        return 0, np.zeros(0, dtype=np.int64)
+    secs = np.floor(ts).astype(np.int64)
+    first = int(secs.min())
+    return first, np.bincount(secs - first)
+
+
+def group_counts_per_second(timestamps_sec: Union[List[float], np.ndarray, TrafficTable]) -> Dict[int, int]:
     """Cuenta paquetes por segundo (redondeando hacia abajo cada timestamp)."""
+    data = _timestamps_of(timestamps_sec)
+    if isinstance(data, np.ndarray):
+        first, counts = counts_per_second_array(data)
+        nz = np.flatnonzero(counts)
+        return dict(zip((nz + first).tolist(), counts[nz].tolist()))
     buckets: Dict[int, int] = Counter()
-    for ts in timestamps_sec:
+    for ts in data:
         buckets[int(math.floor(ts))] += 1
     return dict(buckets)
 
@@ -31,11 +59,16 @@ def expand_counts_with_zeros(counts_per_sec: Dict[int, int]) -> List[int]:
     return [counts_per_sec.get(s, 0) for s in range(smin, smax + 1)]
 
 
-def index_of_dispersion(counts: List[int]) -> float:
+def index_of_dispersion(counts: Union[List[int], np.ndarray]) -> float:
     """Índice de dispersión = Var(X)/E[X] (≈1 en Poisson). Devuelve NaN si media=0."""
     n = len(counts)
     if n == 0:
         return float('nan')
+    if isinstance(counts, np.ndarray):
+        mean = float(counts.mean())
+        if mean == 0:
+            return float('nan')
+        return (float(counts.var(ddof=1)) if n > 1 else 0.0) / mean
     mean = sum(counts) / n
     if mean == 0:
         return float('nan')
@@ -43,26 +76,134 @@ def index_of_dispersion(counts: List[int]) -> float:
     return var / mean
 
 
-def interarrival_times(timestamps_sec: List[float]) -> List[float]:
-    times = sorted(timestamps_sec)
+def interarrival_times(timestamps_sec: Union[List[float], np.ndarray, TrafficTable]) -> Union[List[float], np.ndarray]:
+    """Diferencias entre llegadas consecutivas; con arreglos (o TrafficTable) devuelve un ndarray."""
+    data = _timestamps_of(timestamps_sec)
+    if isinstance(data, np.ndarray):
+        times = np.asarray(data, dtype=np.float64)
+        deltas = np.diff(times)
+        if deltas.size and deltas.min() < 0:
+            # Solo se ordena si hace falta (las capturas suelen venir ordenadas)
+            deltas = np.diff(np.sort(times))
+        return deltas
+    times = sorted(data)
     if len(times) < 2:
         return []
     return [t2 - t1 for t1, t2 in zip(times[:-1], times[1:])]
 
 
-def estimate_lambda_from_interarrivals(deltas: List[float]) -> float:
-    if not deltas:
+def estimate_lambda_from_interarrivals(deltas: Union[List[float], np.ndarray]) -> float:
+    if len(deltas) == 0:
         return float('nan')
+    if isinstance(deltas, np.ndarray):
+        mean_delta = float(deltas.mean())
+        return 1.0 / mean_delta if mean_delta > 0 else float('nan')
     mean_delta = sum(deltas) / len(deltas)
     return 1.0 / mean_delta if mean_delta > 0 else float('nan')
 
 
-def poisson_pmf(k: int, lam: float) -> float:
-    return math.exp(-lam) * (lam ** k) / math.factorial(k)
+def _log_factorial(k: np.ndarray) -> np.ndarray:
+    """log(k!) = lgamma(k + 1) elemento a elemento: costo O(len(k)) sin importar el tamaño de k."""
+    from scipy.special import gammaln
+
+    return gammaln(np.asarray(k, dtype=np.float64) + 1.0)
+
+
+def poisson_logpmf(k, lam: float):
+    """log P(X=k) = k log(lam) - lam - log(k!), vectorizado sobre k (escalar o arreglo)."""
+    k_arr = np.asarray(k, dtype=np.int64)
+    valid = k_arr >= 0
+    kk = np.where(valid, k_arr, 0)
+    if lam == 0:
+        out = np.where(kk == 0, 0.0, -np.inf)
+    else:
+        out = kk * math.log(lam) - lam - _log_factorial(kk)
+    out = np.where(valid, out, -np.inf)
+    return float(out) if out.ndim == 0 else out
+
+
+def poisson_pmf(k, lam: float):
+    """P(X=k) de Poisson(lam), en espacio logarítmico (sin overflow para lam o k grandes).
+    Acepta k escalar o arreglo."""
+    if np.ndim(k) == 0:
+        k = int(k)
+        if k < 0:
+            return 0.0
+        if lam == 0:
+            return 1.0 if k == 0 else 0.0
+        return math.exp(k * math.log(lam) - lam - math.lgamma(k + 1))
+    return np.exp(poisson_logpmf(k, lam))
+
 
+@dataclass(frozen=True)
+class PoissonTable:
+    """pmf, cdf = P(X<=k) y sf = P(X>k) de Poisson(lam) para k = 0..k_max."""
+    lam: float
+    k_max: int
+    pmf: np.ndarray
+    cdf: np.ndarray
+    sf: np.ndarray
 
-def exponential_pdf(x: float, lam: float) -> float:
-    return lam * math.exp(-lam * x) if x >= 0 else 0.0
+    def threshold(self, alpha: float) -> int:
+        """Menor k con P(X>k) <= alpha (k_max si ninguno de la tabla lo cumple)."""
+        idx = np.flatnonzero(self.sf <= alpha)
+        return int(idx[0]) if idx.size else self.k_max
+
+
+@lru_cache(maxsize=256)
+def poisson_table(lam: float, k_max: int) -> PoissonTable:
+    """
+    Tabla Poisson memoizada por (lam, k_max) para histogramas y umbrales repetidos.
+
+    La cola se suma desde lejos (12*sqrt(lam) + 30 más allá de max(k_max, lam)), así sf no
+    pierde precisión por la resta 1 - cdf. Los arreglos son de solo lectura.
+    """
+    if lam < 0 or not math.isfinite(lam):
+        raise ValueError("lam debe ser finito y >= 0")
+    if k_max < 0:
+        raise ValueError("k_max debe ser >= 0")
+    upper = max(k_max, int(math.ceil(lam))) + int(math.ceil(12.0 * math.sqrt(lam))) + 30
+    pmf_all = np.exp(poisson_logpmf(np.arange(upper + 1), lam))
+    cdf = np.cumsum(pmf_all[:k_max + 1])
+    # sf[k] = sum_{j>k} pmf[j]
+    tail = np.cumsum(pmf_all[::-1])[::-1]
+    sf = np.append(tail[1:], 0.0)[:k_max + 1]
+    pmf = pmf_all[:k_max + 1]
+    for arr in (pmf, cdf, sf):
+        arr.flags.writeable = False
+    return PoissonTable(float(lam), int(k_max), pmf, cdf, sf)
+
+
+def poisson_cdf(k, lam: float):
+    """P(X<=k), vectorizado sobre k."""
+    k_arr = np.asarray(k, dtype=np.int64)
+    table = poisson_table(float(lam), max(0, int(k_arr.max())) if k_arr.size else 0)
+    out = np.where(k_arr >= 0, table.cdf[np.clip(k_arr, 0, None)], 0.0)
+    return float(out) if out.ndim == 0 else out
+
+
+def poisson_sf(k, lam: float):
+    """P(X>k), vectorizado sobre k."""
+    k_arr = np.asarray(k, dtype=np.int64)
+    table = poisson_table(float(lam), max(0, int(k_arr.max())) if k_arr.size else 0)
+    out = np.where(k_arr >= 0, table.sf[np.clip(k_arr, 0, None)], 1.0)
+    return float(out) if out.ndim == 0 else out
+
+
+def exponential_pdf(x, lam: float):
+    """Densidad exponencial; acepta x escalar o arreglo."""
+    if np.ndim(x) == 0:
+        return lam * math.exp(-lam * x) if x >= 0 else 0.0
+    x = np.asarray(x, dtype=np.float64)
+    return np.where(x >= 0, lam * np.exp(-lam * np.maximum(x, 0.0)), 0.0)
+
+
+def exponential_cdf(x, lam: float):
+    """P(T<=x) = 1 - exp(-lam x) (con expm1 para x pequeños); acepta escalar o arreglo."""
+    if np.ndim(x) == 0:
+        return -math.expm1(-lam * x) if x >= 0 else 0.0
+    x = np.asarray(x, dtype=np.float64)
+    return np.where(x >= 0, -np.expm1(-lam * np.maximum(x, 0.0)), 0.0)
 
 
 @dataclass
@@ -74,31 +215,143 @@ class Contingency:
     independent: bool
 
 
-def contingency_protocol_size(protocols: List[int], sizes: List[int], threshold: int = 500) -> Contingency:
-    """Construye tabla conjunta P(Protocol, Tam) con tamaños discretizados <=threshold (Pequeño) y >threshold (Grande)."""
-    if len(protocols) != len(sizes):
-        raise ValueError("protocols y sizes deben tener misma longitud")
-    n = len(protocols)
-    if n == 0:
-        return Contingency({}, float('nan'), float('nan'), float('nan'), False)
+PROTOCOL_NAMES = {6: 'TCP', 17: 'UDP'}
+
+
+def proto_name(p: int) -> str:
+    return PROTOCOL_NAMES.get(p, str(p))
+
+
+class ContingencyCounts:
+    """
+    Acumulador de la tabla conjunta Protocolo x Tamaño por conteos.
+
+    Las filas son los 256 códigos de protocolo IP y las columnas los bins de tamaño
+    definidos por ``size_edges`` (bin i: edges[i-1] < tamaño <= edges[i]; el último
+    bin es > edges[-1]). Con el umbral por defecto (500) los bins son 'Pequeño' y
+    'Grande', como en ``contingency_protocol_size``.
+
+    Se actualiza por bloques de arreglos con un único ``np.bincount`` sobre el
+    código protocolo*bins + bin, se combina entre shards o procesos con ``merge``
+    y el estado es solo la matriz de conteos (256 x bins enteros, unos pocos KB),
+    sin importar el número de paquetes. Marginales, condicionales e independencia
+    se calculan desde los conteos.
+    """
+
+    def __init__(self, size_edges: Sequence[int] = (500,), labels: Optional[Sequence[str]] = None):
+        edges = np.asarray(size_edges, dtype=np.int64)
+        if edges.ndim != 1 or edges.size == 0 or np.any(np.diff(edges) <= 0):
+            raise ValueError("size_edges debe ser una secuencia creciente no vacía")
+        self.size_edges = edges
+        if labels is None:
+            if edges.size == 1:
+                labels = ['Pequeño', 'Grande']
+            else:
+                labels = ([f"<={edges[0]}"] + [f"{a + 1}-{b}" for a, b in zip(edges[:-1], edges[1:])]
+                          + [f">{edges[-1]}"])
+        if len(labels) != edges.size + 1:
+            raise ValueError("labels debe tener len(size_edges) + 1 elementos")
+        self.labels = list(labels)
+        self.counts = np.zeros((256, edges.size + 1), dtype=np.int64)
+
+    @property
+    def n(self) -> int:
+        return int(self.counts.sum())
+
+    def update(self, protocols, sizes) -> None:
+        protocols = np.asarray(protocols)
+        sizes = np.asarray(sizes)
+        if protocols.shape != sizes.shape:
+            raise ValueError("protocols y sizes deben tener misma longitud")
+        if protocols.size == 0:
+            return
+        if protocols.dtype != np.uint8 and (protocols.min() < 0 or protocols.max() > 255):
+            raise ValueError("Protocol fuera de rango (0-255)")
+        nbins = self.counts.shape[1]
+        bins = np.searchsorted(self.size_edges, sizes, side='left')
+        code = protocols.astype(np.int64) * nbins + bins
+        self.counts += np.bincount(code, minlength=self.counts.size).reshape(self.counts.shape)
+
+    def update_table(self, table: TrafficTable) -> None:
+        self.update(table.protocols, table.sizes)
 
-    def proto_name(p: int) -> str:
-        return 'TCP' if p == 6 else ('UDP' if p == 17 else str(p))
+    def merge(self, other: "ContingencyCounts") -> "ContingencyCounts":
+        """Suma los conteos de ``other`` (mismos bins) en esta tabla y la devuelve."""
+        if not np.array_equal(self.size_edges, other.size_edges):
+            raise ValueError("No se pueden combinar tablas con bins de tamaño distintos")
+        self.counts += other.counts
+        return self
 
-    def size_cat(s: int) -> str:
-        return 'Pequeño' if s <= threshold else 'Grande'
+    def _bin(self, size_label: str) -> int:
+        return self.labels.index(size_label)
 
-    pairs = [(proto_name(p), size_cat(s)) for p, s in zip(protocols, sizes)]
-    c = Counter(pairs)
-    table: Dict[Tuple[str, str], float] = {k: v / n for k, v in c.items()}
+    def count(self, protocol: int, size_label: str) -> int:
+        return int(self.counts[protocol, self._bin(size_label)])
 
-    p_tcp = sum(v for (prot, _), v in table.items() if prot == 'TCP')
-    p_grande = sum(v for (_, sc), v in table.items() if sc == 'Grande')
-    p_tcp_and_grande = table.get(('TCP', 'Grande'), 0.0)
-    p_grande_given_tcp = (p_tcp_and_grande / p_tcp) if p_tcp > 0 else float('nan')
-    independent = math.isfinite(p_grande_given_tcp) and abs(p_grande_given_tcp - p_grande) < 1e-6
+    def joint(self, protocol: int, size_label: str) -> float:
+        n = self.n
+        return self.count(protocol, size_label) / n if n else float('nan')
 
-    return Contingency(table, p_tcp, p_grande, p_grande_given_tcp, independent)
+    def p_protocol(self, protocol: int) -> float:
+        n = self.n
+        return float(self.counts[protocol].sum()) / n if n else float('nan')
+
+    def p_size(self, size_label: str) -> float:
+        n = self.n
+        return float(self.counts[:, self._bin(size_label)].sum()) / n if n else float('nan')
+
+    def p_size_given_protocol(self, size_label: str, protocol: int) -> float:
+        total = int(self.counts[protocol].sum())
+        return self.count(protocol, size_label) / total if total else float('nan')
+
+    def independent(self, protocol: int, size_label: str, tol: float = 1e-6) -> bool:
+        """P(tamaño|protocolo) == P(tamaño) dentro de ``tol``."""
+        cond = self.p_size_given_protocol(size_label, protocol)
+        return math.isfinite(cond) and abs(cond - self.p_size(size_label)) < tol
+
+    def table(self) -> Dict[Tuple[str, str], float]:
+        """Probabilidades conjuntas de las combinaciones presentes, con claves (protocolo, categoría)."""
+        n = self.n
+        rows, cols = np.nonzero(self.counts)
+        return {(proto_name(int(p)), self.labels[b]): int(self.counts[p, b]) / n for p, b in zip(rows, cols)}
+
+    def rows(self, protocols: Sequence[int] = (6, 17)) -> List[dict]:
+        """Filas (protocolo, categoría, conteo, probabilidad) para todas las combinaciones pedidas."""
+        n = self.n
+        out = []
+        for p in protocols:
+            for b, label in enumerate(self.labels):
+                c = int(self.counts[p, b])
+                out.append({'protocolo': proto_name(p), 'tam_categoria': label, 'conteo': c,
+                            'probabilidad': c / n if n > 0 else float('nan')})
+        return out
+
+    def summary(self, protocol: int = 6, size_label: Optional[str] = None) -> "Contingency":
+        """``Contingency`` para un protocolo y una categoría (por defecto TCP y el bin mayor)."""
+        if self.n == 0:
+            return Contingency({}, float('nan'), float('nan'), float('nan'), False)
+        size_label = size_label or self.labels[-1]
+        return Contingency(self.table(), self.p_protocol(protocol), self.p_size(size_label),
+                           self.p_size_given_protocol(size_label, protocol),
+                           self.independent(protocol, size_label))
+
+
+def contingency_protocol_size(protocols: Union[List[int], np.ndarray, TrafficTable], sizes=None,
+                              threshold: int = 500) -> Contingency:
+    """Construye tabla conjunta P(Protocol, Tam) con tamaños discretizados <=threshold (Pequeño) y >threshold (Grande).
+
+    Acepta listas o arreglos de protocolos y tamaños, o directamente una TrafficTable.
+    Se calcula por conteos con ``ContingencyCounts`` (una pasada, sin tuplas por paquete)."""
+    acc = ContingencyCounts((threshold,))
+    if isinstance(protocols, TrafficTable):
+        acc.update_table(protocols)
+        return acc.summary()
+    if sizes is None:
+        raise ValueError("Falta sizes")
+    if len(protocols) != len(sizes):
+        raise ValueError("protocols y sizes deben tener misma longitud")
+    acc.update(np.asarray(protocols, dtype=np.int64), np.asarray(sizes, dtype=np.int64))
+    return acc.summary()
 
 
 def poisson_anomaly_threshold(lam: float, z: float = 3.0) -> int:
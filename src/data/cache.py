@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from .loaders import iter_network_csv, read_network_table
+from .table import TrafficTable
+
+# Directorio por defecto; REDTRAFFIC_CACHE_DIR lo reemplaza
+DEFAULT_CACHE_DIR = Path(os.environ.get("REDTRAFFIC_CACHE_DIR",
+                                        Path.home() / ".cache" / "redtrafficmodeling"))
+
+# Se incrementa si cambia el formato de los archivos o el parseo del CSV
+CACHE_VERSION = 1
+
+_MANIFEST_FILE = "manifest.json"
+# Columna -> (archivo, dtype little-endian en disco)
+_COLUMNS = {
+    "timestamps": ("timestamps.f64", "<f8"),
+    "sizes": ("sizes.u32", "<u4"),
+    "protocols": ("protocols.u8", "u1"),
+}
+_HASH_BLOCK = 1 << 20
+
+
+def file_fingerprint(path: Union[str, Path], content_hash: bool = True) -> dict:
+    """Size, mtime (ns) and, optionally, a BLAKE2b digest of the file contents."""
+    st = os.stat(path)
+    fp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if content_hash:
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+                h.update(block)
+        fp["blake2b"] = h.hexdigest()
+    return fp
+
+
+def _entry_dir(path: Path, cache_dir: Path) -> Path:
+    key = hashlib.blake2b(str(path).encode('utf-8'), digest_size=8).hexdigest()
+    return cache_dir / f"{path.name}-{key}"
+
+
+def _read_manifest(entry: Path) -> Optional[dict]:
+    try:
+        manifest = json.loads((entry / _MANIFEST_FILE).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != CACHE_VERSION:
+        return None
+    return manifest
+
+
+def _write_manifest(entry: Path, manifest: dict) -> None:
+    # Reemplazo atómico: un lector ve el manifiesto viejo o el nuevo, nunca uno a medias
+    fd, tmp = tempfile.mkstemp(dir=entry, suffix=".tmp")
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, entry / _MANIFEST_FILE)
+
+
+def _open_entry(entry: Path, manifest: dict, mmap: bool) -> TrafficTable:
+    n = int(manifest["length"])
+    cols = {}
+    for name, (fname, dtype) in _COLUMNS.items():
+        file = entry / f"{manifest['blake2b']}.{fname}"
+        if n == 0:
+            cols[name] = np.empty(0, dtype=dtype)
+        elif mmap:
+            cols[name] = np.memmap(file, dtype=dtype, mode='r', shape=(n,))
+        else:
+            cols[name] = np.fromfile(file, dtype=dtype, count=n)
+    table = TrafficTable(cols["timestamps"], cols["sizes"], cols["protocols"])
+    table._sorted = manifest.get("sorted")
+    return table
+
+
+def _build_entry(path: Path, entry: Path, fingerprint: dict, chunk_rows: int, sample_rows: int) -> dict:
+    entry.mkdir(parents=True, exist_ok=True)
+    prefix = fingerprint["blake2b"]
+    tmp_files = {name: entry / f"{prefix}.{fname}.tmp" for name, (fname, _) in _COLUMNS.items()}
+    n = 0
+    ordered = True
+    last = -np.inf
+    try:
+        handles = {name: open(tmp, 'wb') for name, tmp in tmp_files.items()}
+        try:
+            # Por bloques: la memoria queda acotada por chunk_rows aunque la captura sea enorme
+            for ts, sizes, protos in iter_network_csv(path, chunk_rows, sample_rows):
+                if ts.size == 0:
+                    continue
+                if ordered and (ts[0] < last or np.any(ts[1:] < ts[:-1])):
+                    ordered = False
+                last = float(ts[-1])
+                for name, arr in (("timestamps", ts), ("sizes", sizes), ("protocols", protos)):
+                    np.asarray(arr, dtype=_COLUMNS[name][1]).tofile(handles[name])
+                n += ts.size
+        finally:
+            for fh in handles.values():
+                fh.close()
+        for name, (fname, _) in _COLUMNS.items():
+            os.replace(tmp_files[name], entry / f"{prefix}.{fname}")
+    except BaseException:
+        for tmp in tmp_files.values():
+            if tmp.exists():
+                tmp.unlink()
+        raise
+    manifest = dict(fingerprint, version=CACHE_VERSION, source=str(path), length=n, sorted=ordered)
+    _write_manifest(entry, manifest)
+    # Columnas de versiones anteriores del archivo (en Windows pueden seguir mapeadas)
+    for old in entry.iterdir():
+        if not old.name.startswith(prefix) and old.name != _MANIFEST_FILE and not old.name.endswith(".tmp"):
+            try:
+                old.unlink()
+            except OSError:
+                pass
+    return manifest
+
+
+def load_network_table(path: Union[str, Path], cache_dir: Union[str, Path, None] = None,
+                       use_cache: bool = True, mmap: bool = True, chunk_rows: int = 100_000,
+                       sample_rows: int = 1000) -> TrafficTable:
+    """
+    Carga la captura como ``TrafficTable`` a través de una caché binaria en disco.
+
+    Cada CSV tiene una entrada en ``cache_dir`` (por defecto ``DEFAULT_CACHE_DIR``)
+    con una columna cruda little-endian por campo y un manifiesto JSON con ruta,
+    tamaño, mtime y hash BLAKE2b del contenido. Si tamaño y mtime coinciden, la
+    carga es solo abrir las columnas con memoria mapeada; si el mtime cambió pero
+    el hash del contenido es el mismo, se reutiliza la entrada; en otro caso la
+    entrada está obsoleta y se reconstruye (por bloques, escribiendo a archivos
+    temporales y reemplazando el manifiesto de forma atómica).
+
+    Con ``use_cache=False`` equivale a ``read_network_table``.
+    """
+    path = Path(path).resolve()
+    if not use_cache:
+        return read_network_table(str(path), sample_rows)
+    entry = _entry_dir(path, Path(cache_dir) if cache_dir is not None else DEFAULT_CACHE_DIR)
+    manifest = _read_manifest(entry)
+    quick = file_fingerprint(path, content_hash=False)
+    if manifest is not None and (manifest["size"], manifest["mtime_ns"]) == (quick["size"], quick["mtime_ns"]):
+        return _open_entry(entry, manifest, mmap)
+    fingerprint = file_fingerprint(path)
+    if manifest is not None and (manifest["size"], manifest["blake2b"]) == (fingerprint["size"], fingerprint["blake2b"]):
+        # Solo cambió el mtime (copia, touch): el contenido cacheado sigue siendo válido
+        manifest["mtime_ns"] = fingerprint["mtime_ns"]
+        _write_manifest(entry, manifest)
+        return _open_entry(entry, manifest, mmap)
+    manifest = _build_entry(path, entry, fingerprint, chunk_rows, sample_rows)
+    return _open_entry(entry, manifest, mmap)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import bz2
+import gzip
+import io
+import lzma
+import queue
+import threading
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+# Firmas (magic bytes) al inicio del archivo
+_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+
+# Bloques de 1 MiB: pocas llamadas al descompresor y al parser
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+
+def detect_compression(path: Union[str, Path]) -> Optional[str]:
+    """'gzip', 'bz2', 'xz' or 'zstd' from the file's magic bytes; None for plain files."""
+    with open(path, 'rb') as f:
+        head = f.read(8)
+    for magic, name in _MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def _open_zstd(path: Union[str, Path], buffer_size: int) -> BinaryIO:
+    try:
+        import zstandard
+    except ImportError:
+        try:
+            from compression import zstd  # Python >= 3.14
+        except ImportError:
+            raise ImportError("Para leer capturas .zst instala el paquete 'zstandard'") from None
+        return zstd.open(path, 'rb')
+    raw = open(path, 'rb')
+    return zstandard.ZstdDecompressor().stream_reader(raw, read_size=buffer_size, closefd=True)
+
+
+def _open_decompressed(path: Union[str, Path], kind: str, buffer_size: int) -> BinaryIO:
+    if kind == "gzip":
+        return gzip.open(path, 'rb')
+    if kind == "bz2":
+        return bz2.open(path, 'rb')
+    if kind == "xz":
+        return lzma.open(path, 'rb')
+    if kind == "zstd":
+        return _open_zstd(path, buffer_size)
+    raise ValueError(f"Compresión no soportada: {kind}")
+
+
+class _ThreadedReader(io.RawIOBase):
+    """
+    Reads ``source`` on a background thread into a bounded queue of blocks, so
+    decompression (zlib, bz2, lzma and zstd release the GIL) overlaps with whoever
+    consumes the stream. At most ``max_blocks`` blocks are buffered.
+    """
+
+    def __init__(self, source: BinaryIO, block_size: int = DEFAULT_BUFFER_SIZE, max_blocks: int = 4):
+        super().__init__()
+        self._source = source
+        self._block_size = block_size
+        self._queue: queue.Queue = queue.Queue(maxsize=max_blocks)
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._buf = memoryview(b"")
+        self._eof = False
+        self._thread = threading.Thread(target=self._pump, name="capture-decompress", daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> None:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _pump(self) -> None:
+        try:
+            while not self._stop.is_set():
+                block = self._source.read(self._block_size)
+                if not block:
+                    break
+                self._put(block)
+        except BaseException as e:  # se relanza en el hilo lector
+            self._error = e
+        finally:
+            self._put(None)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buf and not self._eof:
+            block = self._queue.get()
+            if block is None:
+                self._eof = True
+                if self._error is not None:
+                    raise self._error
+            else:
+                self._buf = memoryview(block)
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stop.set()
+            # Libera un productor bloqueado en put()
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._thread.join()
+            self._source.close()
+        super().close()
+
+
+def open_capture(path: Union[str, Path], text: bool = False, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 threaded: bool = True) -> Union[BinaryIO, io.TextIOWrapper]:
+    """
+    Opens a capture file, decompressing it on the fly if its magic bytes say it is
+    gzip, bz2, xz or zstd (zstd needs the optional ``zstandard`` package, or
+    Python 3.14+). Nothing is written to disk.
+
+    Reads go through ``buffer_size`` buffers. With ``threaded``, compressed input
+    is decoded on a background thread so decompression overlaps with parsing.
+    ``text=True`` returns a UTF-8 text stream with ``newline=''`` (as ``csv``
+    expects); otherwise a binary stream, which ``pandas.read_csv`` accepts.
+    """
+    kind = detect_compression(path)
+    if kind is None:
+        raw: BinaryIO = open(path, 'rb', buffering=buffer_size)
+    else:
+        source = _open_decompressed(path, kind, buffer_size)
+        if threaded:
+            raw = io.BufferedReader(_ThreadedReader(source, buffer_size), buffer_size=buffer_size)
+        else:
+            raw = io.BufferedReader(source, buffer_size=buffer_size)
+    if text:
+        return io.TextIOWrapper(raw, encoding='utf-8', newline='')
+    return raw
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .cache import load_network_table
+from .loaders import iter_network_csv, read_network_table
+from .table import TrafficTable
+
+Source = Union[str, Path, Sequence[Union[str, Path]]]
+
+
+def expand_capture_paths(source: Source, pattern: str = "*.csv*") -> List[Path]:
+    """
+    Lista de archivos de captura a partir de una ruta, un directorio (archivos que
+    cumplen ``pattern``; por defecto también los .csv.gz/.bz2/.xz/.zst), un glob (``capturas/2018-02-*.csv``, admite ``**``) o una
+    secuencia de cualquiera de ellos. Orden por nombre, sin duplicados.
+    """
+    items = [source] if isinstance(source, (str, Path)) else list(source)
+    found: List[Path] = []
+    for item in items:
+        p = Path(item)
+        if p.is_dir():
+            found.extend(q for q in p.glob(pattern) if q.is_file())
+        elif p.is_file():
+            found.append(p)
+        else:
+            matches = [Path(m) for m in glob.glob(str(item), recursive=True)]
+            found.extend(m for m in matches if m.is_file())
+    paths = sorted({p.resolve() for p in found})
+    if not paths:
+        raise FileNotFoundError(f"No se encontraron capturas en: {source}")
+    return paths
+
+
+def _load_one(args) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    path, use_cache, cache_dir, sample_rows = args
+    if use_cache:
+        table = load_network_table(path, cache_dir=cache_dir, sample_rows=sample_rows)
+    else:
+        table = read_network_table(str(path), sample_rows)
+    table = table.sorted()
+    # Arreglos en memoria: las vistas mapeadas no deben viajar entre procesos
+    return np.array(table.timestamps), np.array(table.sizes), np.array(table.protocols)
+
+
+def merge_sorted_tables(tables: Iterable[TrafficTable]) -> TrafficTable:
+    """
+    Une tablas ordenadas por timestamp en una sola tabla ordenada globalmente.
+
+    Si los rangos de tiempo no se solapan (archivos rotados consecutivos) basta
+    concatenar. Si no, se concatena y se ordena con un sort estable: timsort
+    detecta cada tabla como una corrida ya ordenada y las mezcla en O(n log k),
+    igual que una mezcla k-way, y a igual timestamp conserva el orden de entrada.
+    """
+    tables = [t.sorted() for t in tables if len(t)]
+    if not tables:
+        return TrafficTable.empty()
+    merged = TrafficTable.concat(tables)
+    disjoint = all(a.timestamps[-1] <= b.timestamps[0] for a, b in zip(tables, tables[1:]))
+    if disjoint:
+        merged._sorted = True
+        return merged
+    return merged.sorted()
+
+
+def read_network_tables(source: Source, workers: Optional[int] = None, use_cache: bool = False,
+                        cache_dir: Union[str, Path, None] = None, pattern: str = "*.csv*",
+                        sample_rows: int = 1000) -> TrafficTable:
+    """
+    Lee varias capturas (ver ``expand_capture_paths``) en un pool de procesos y
+    devuelve una única ``TrafficTable`` ordenada por timestamp.
+
+    Cada archivo se parsea con el lector columnar (o la caché binaria con
+    ``use_cache``), se ordena por separado y luego se mezclan con
+    ``merge_sorted_tables``. ``workers=None`` usa todos los núcleos; con 1 (o un
+    solo archivo) no se crea el pool.
+    """
+    paths = expand_capture_paths(source, pattern)
+    tasks = [(p, use_cache, cache_dir, sample_rows) for p in paths]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+    if workers == 1:
+        columns = [_load_one(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            columns = list(pool.map(_load_one, tasks))
+    return merge_sorted_tables(TrafficTable(*c) for c in columns)
+
+
+def iter_merged_tables(source: Source, chunk_rows: int = 100_000, pattern: str = "*.csv*",
+                       sample_rows: int = 1000) -> Iterator[TrafficTable]:
+    """
+    Variante en streaming de ``read_network_tables``: mezcla k-way los archivos
+    leídos por bloques y entrega ``TrafficTable`` consecutivas en orden global.
+
+    Cada archivo debe estar ordenado por timestamp. Solo se entregan las filas
+    anteriores al menor último timestamp de los bloques pendientes (ninguna fila
+    posterior puede quedar antes), así la memoria queda acotada por
+    ``k x chunk_rows`` con k archivos (más los empates en ese límite),
+    independientemente del tamaño total. El resultado concatenado coincide fila a
+    fila con ``read_network_tables``.
+    """
+    paths = expand_capture_paths(source, pattern)
+    readers = [iter_network_csv(str(p), chunk_rows, sample_rows) for p in paths]
+    pending = [TrafficTable.empty() for _ in readers]
+    done = [False] * len(readers)
+    last = [-np.inf] * len(readers)
+
+    def extend(i: int) -> None:
+        # Agrega el siguiente bloque de la fuente i (o la marca como agotada)
+        block = next(readers[i], None)
+        if block is None:
+            done[i] = True
+            return
+        table = TrafficTable(*block)
+        if len(table) == 0:
+            return
+        if not table.is_sorted or table.timestamps[0] < last[i]:
+            raise ValueError(f"La captura no está ordenada por timestamp: {paths[i]}")
+        last[i] = float(table.timestamps[-1])
+        prev = pending[i]
+        pending[i] = TrafficTable.concat([prev, table]) if len(prev) else table
+        pending[i]._sorted = True
+
+    while True:
+        for i in range(len(readers)):
+            while not done[i] and len(pending[i]) == 0:
+                extend(i)
+        open_ = [i for i in range(len(readers)) if not done[i]]
+        if not open_:
+            rest = merge_sorted_tables(pending)
+            if len(rest):
+                yield rest
+            return
+        # Las filas anteriores a este límite ya están en su posición definitiva; las
+        # iguales esperan para salir junto a sus empates de otros archivos
+        limit = min(float(pending[i].timestamps[-1]) for i in open_)
+        ready = []
+        for i, t in enumerate(pending):
+            cut = int(np.searchsorted(t.timestamps, limit, side='left'))
+            ready.append(t[:cut])
+            pending[i] = t[cut:]
+        if any(len(t) for t in ready):
+            yield merge_sorted_tables(ready)
+        else:
+            for i in open_:
+                if pending[i].timestamps[-1] == limit:
+                    extend(i)
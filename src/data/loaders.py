@@ -1,10 +1,25 @@
 from __future__ import annotations
 
+from contextlib import nullcontext
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple, Union
 import csv
 
+import numpy as np
+import pandas as pd
+
+from .compression import open_capture
+from .table import TrafficTable, _EPOCH, _epoch_seconds
+
+# Formatos de timestamp aceptados, en orden de prueba
+TIMESTAMP_FORMATS = [
+    "%d/%m/%Y %I:%M:%S %p",  # 20/02/2018 08:31:01 AM (12h con segundos)
+    "%d/%m/%Y %H:%M:%S",     # 20/02/2018 08:31:01 (24h con segundos)
+    "%d/%m/%Y %H:%M",        # 20/02/2018 08:31 (24h sin segundos)
+]
+
 
 @dataclass
 class TrafficRecord:
@@ -13,38 +28,213 @@ class TrafficRecord:
     protocol: int
 
 
+def _parse_timestamp(ts_str: str) -> datetime:
+    ts_str = ts_str.strip()
+    # Probar múltiples formatos comunes
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(ts_str, fmt)
+        except Exception:
+            continue
+    raise ValueError(f"Timestamp no reconocido: '{ts_str}'")
+
+
+# Entradas de la caché de timestamps ya parseados (capturas de baja resolución
+# repiten el mismo texto en miles de filas)
+TIMESTAMP_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def _timestamp_epoch_cached(ts_str: str) -> float:
+    # Texto -> epoch (naive como UTC); compartido por el lector de registros y el columnar
+    return _epoch_seconds(_parse_timestamp(ts_str))
+
+
+def detect_timestamp_format(samples: Iterable[str]) -> Optional[str]:
+    """First format in TIMESTAMP_FORMATS that parses every sample (None if none does)."""
+    samples = [s.strip() for s in samples]
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            for s in samples:
+                datetime.strptime(s, fmt)
+            return fmt
+        except ValueError:
+            continue
+    return None
+
+
+def _timestamps_to_epoch(ts_str: pd.Series, sample_rows: int = 1000, fmt: Optional[str] = None) -> np.ndarray:
+    """
+    Converts a column of timestamp strings to epoch seconds (float64).
+
+    The format (unless given) is detected once on a sample and the whole column is
+    parsed in bulk; only rows that do not match it go through the per-row
+    multi-format parser.
+    """
+    if len(ts_str) == 0:
+        return np.empty(0, dtype=np.float64)
+    if fmt is None:
+        fmt = detect_timestamp_format(ts_str.iloc[:sample_rows].dropna())
+    if fmt is not None:
+        parsed = pd.to_datetime(ts_str, format=fmt, errors='coerce', cache=True)
+    else:
+        parsed = pd.Series(pd.NaT, index=ts_str.index, dtype='datetime64[ns]')
+    epoch = parsed.to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9
+    bad = np.flatnonzero(parsed.isna().to_numpy())
+    for i in bad:
+        raw = ts_str.iloc[i]
+        if not isinstance(raw, str):
+            raise ValueError(f"Timestamp no reconocido: '{raw}'")
+        epoch[i] = _timestamp_epoch_cached(raw)
+    return epoch
+
+
+def _checked_cast(values: np.ndarray, dtype, name: str) -> np.ndarray:
+    info = np.iinfo(dtype)
+    if values.size and (values.min() < info.min or values.max() > info.max):
+        raise ValueError(f"{name} fuera de rango para {np.dtype(dtype).name}")
+    return values.astype(dtype, copy=False)
+
+
+def read_network_csv_columns(path: str, sample_rows: int = 1000) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Columnar, vectorized variant of ``read_network_csv``.
+
+    Returns (timestamps, sizes, protocols) as NumPy arrays: epoch seconds (float64,
+    naive timestamps taken as UTC), packet sizes (uint32) and protocol numbers (uint8),
+    in file order. The CSV is parsed by pandas' C reader, the timestamp format is
+    detected once from the first ``sample_rows`` rows and applied to the whole column.
+    Compressed captures are decoded on the fly (see ``open_capture``).
+    """
+    with open_capture(path) as f:
+        df = pd.read_csv(f, **_CSV_OPTIONS)
+    return _frame_to_columns(df, sample_rows)
+
+
+_CSV_OPTIONS = dict(
+    usecols=['Timestamp', 'Packet_Size', 'Protocol'],
+    dtype={'Timestamp': object, 'Packet_Size': np.int64, 'Protocol': np.int64},
+    encoding='utf-8',
+)
+
+
+def _frame_to_columns(df: pd.DataFrame, sample_rows: int = 1000,
+                      fmt: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    timestamps = _timestamps_to_epoch(df['Timestamp'], sample_rows, fmt)
+    sizes = _checked_cast(df['Packet_Size'].to_numpy(), np.uint32, "Packet_Size")
+    protocols = _checked_cast(df['Protocol'].to_numpy(), np.uint8, "Protocol")
+    return timestamps, sizes, protocols
+
+
+def read_network_table(path: str, sample_rows: int = 1000) -> TrafficTable:
+    """Reads the CSV into a columnar ``TrafficTable`` (see ``read_network_csv_columns``)."""
+    return TrafficTable(*read_network_csv_columns(path, sample_rows))
+
+
+def iter_network_csv(path: Union[str, BinaryIO], chunk_rows: int = 100_000,
+                     sample_rows: int = 1000) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Streaming variant of ``read_network_csv_columns``: yields (timestamps, sizes,
+    protocols) batches of at most ``chunk_rows`` rows, so peak memory is bounded by
+    the chunk size. The timestamp format is detected on the first batch and reused.
+    ``path`` may also be an open binary stream (e.g. ``sys.stdin.buffer``).
+    """
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows debe ser > 0")
+    fmt: Optional[str] = None
+    with (nullcontext(path) if hasattr(path, 'read') else open_capture(path)) as f, \
+            pd.read_csv(f, chunksize=chunk_rows, **_CSV_OPTIONS) as reader:
+        for df in reader:
+            if fmt is None and len(df):
+                fmt = detect_timestamp_format(df['Timestamp'].iloc[:sample_rows].dropna())
+            yield _frame_to_columns(df, sample_rows, fmt)
+
+
 def read_network_csv(path: str, tz: Optional[str] = None) -> List[TrafficRecord]:
     """
     Reads CSV with columns: Timestamp,Packet_Size,Protocol
     Timestamp format example: 20/02/2018 08:31 (day/month/year HH:MM)
+    The file may be gzip/bz2/xz/zstd compressed (detected by its magic bytes).
     """
     records: List[TrafficRecord] = []
-    with open(path, 'r', newline='', encoding='utf-8') as f:
+    prev_raw: Optional[str] = None
+    ts: Optional[datetime] = None
+    with open_capture(path, text=True) as f:
         reader = csv.DictReader(f)
         for row in reader:
-            ts_str = row['Timestamp'].strip()
-            # Probar múltiples formatos comunes
-            fmts = [
-                "%d/%m/%Y %I:%M:%S %p",  # 20/02/2018 08:31:01 AM (12h con segundos)
-                "%d/%m/%Y %H:%M:%S",     # 20/02/2018 08:31:01 (24h con segundos)
-                "%d/%m/%Y %H:%M",        # 20/02/2018 08:31 (24h sin segundos)
-            ]
-            ts: Optional[datetime] = None
-            for fmt in fmts:
-                try:
-                    ts = datetime.strptime(ts_str, fmt)
-                    break
-                except Exception:
-                    continue
-            if ts is None:
-                raise ValueError(f"Timestamp no reconocido: '{ts_str}'")
+            raw = row['Timestamp']
+            # Camino rápido: mismo texto que la fila anterior; si no, caché LRU texto -> epoch
+            if raw != prev_raw:
+                ts = _EPOCH + timedelta(seconds=_timestamp_epoch_cached(raw))
+                prev_raw = raw
             size = int(row['Packet_Size'])
             proto = int(row['Protocol'])
             records.append(TrafficRecord(ts, size, proto))
     return records
 
 
-def estimate_rates_from_records(records: List[TrafficRecord], interval_seconds: int = 60,
+class RateEstimator:
+    """
+    Incremental (lambda, mu) estimator fed batch by batch, e.g. from ``iter_network_csv``.
+
+    ``estimate_rates_from_records`` groups arrivals into ``interval_seconds`` buckets
+    counted from the first timestamp and divides by the covered time, so its lambda
+    only depends on the packet count and the first/last timestamps:
+    n / ((int(t_max - t_min) // interval + 1) * interval). This class therefore keeps
+    just the count, min/max time and byte total, O(1) state regardless of input
+    size and order, and returns the same pair.
+    """
+
+    # Enlace supuesto para la heurística de servicio (ver estimate_rates_from_records)
+    LINK_MBPS = 100
+
+    def __init__(self, interval_seconds: int = 60):
+        if interval_seconds <= 0:
+            interval_seconds = 60
+        self.interval_seconds = interval_seconds
+        self.count = 0
+        self.total_bytes = 0
+        self.t_min = float('inf')
+        self.t_max = float('-inf')
+
+    def update(self, timestamps, sizes) -> None:
+        """Adds a batch: epoch seconds and packet sizes (arrays or sequences)."""
+        ts = np.asarray(timestamps, dtype=np.float64)
+        if ts.size == 0:
+            return
+        if len(sizes) != ts.size:
+            raise ValueError("timestamps y sizes deben tener misma longitud")
+        self.count += int(ts.size)
+        self.total_bytes += int(np.sum(sizes, dtype=np.int64))
+        self.t_min = min(self.t_min, float(ts.min()))
+        self.t_max = max(self.t_max, float(ts.max()))
+
+    def update_records(self, records: Iterable[TrafficRecord]) -> None:
+        self.update_table(TrafficTable.from_records(records))
+
+    def update_table(self, table: TrafficTable) -> None:
+        self.update(table.timestamps, table.sizes)
+
+    def rates(self, mean_service_time_ms: Optional[float] = None) -> Tuple[float, float]:
+        """Returns (lambda, mu) as ``estimate_rates_from_records`` would for the data seen."""
+        if self.count == 0:
+            raise ValueError("No records provided")
+        last_bucket = int(self.t_max - self.t_min) // self.interval_seconds
+        total_time = (last_bucket + 1) * self.interval_seconds
+        lambda_est = self.count / max(1, total_time)
+
+        if mean_service_time_ms is not None and mean_service_time_ms > 0:
+            mu_est = 1000.0 / mean_service_time_ms
+        else:
+            # Heuristic: service time ~ packet_size_bytes * 8 / link_bps, mu = 1 / mean_service_time
+            link_bps = self.LINK_MBPS * 1_000_000
+            avg_bits = self.total_bytes * 8 / self.count
+            mean_service_time = avg_bits / link_bps  # seconds
+            mu_est = 1.0 / mean_service_time if mean_service_time > 0 else 1.0
+        return lambda_est, mu_est
+
+
+def estimate_rates_from_records(records: Union[List[TrafficRecord], TrafficTable], interval_seconds: int = 60,
                                 mean_service_time_ms: Optional[float] = None) -> Tuple[float, float]:
     """
     Estimate Poisson arrival rate lambda and service rate mu from traffic records.
@@ -53,43 +243,15 @@ def estimate_rates_from_records(records: List[TrafficRecord], interval_seconds:
     - mu: if mean_service_time_ms provided, mu = 1000 / mean_service_time_ms (per second).
         Otherwise, a simple heuristic uses packet size to guess service time at a given link rate.
     Returns (lambda, mu)
+
+    Accepts a list of records or a ``TrafficTable``. Single pass without sorting;
+    see ``RateEstimator`` for the streaming form.
     """
-    if not records:
+    if len(records) == 0:
         raise ValueError("No records provided")
-
-    # Group by minute (or provided interval)
-    if interval_seconds <= 0:
-        interval_seconds = 60
-
-    # Sort records
-    records_sorted = sorted(records, key=lambda r: r.timestamp)
-
-    # Count per interval
-    start = records_sorted[0].timestamp
-    end = records_sorted[-1].timestamp
-    total_seconds = max(1, int((end - start).total_seconds()) + 1)
-
-    # Build buckets
-    buckets = {}
-    for rec in records_sorted:
-        delta = int((rec.timestamp - start).total_seconds())
-        bucket = delta // interval_seconds
-        buckets[bucket] = buckets.get(bucket, 0) + 1
-
-    total_arrivals = sum(buckets.values())
-    total_time = (max(buckets.keys()) + 1) * interval_seconds if buckets else total_seconds
-    lambda_est = total_arrivals / max(1, total_time)
-
-    # Service rate estimation
-    if mean_service_time_ms is not None and mean_service_time_ms > 0:
-        mu_est = 1000.0 / mean_service_time_ms
+    est = RateEstimator(interval_seconds)
+    if isinstance(records, TrafficTable):
+        est.update_table(records)
     else:
-        # Heuristic: assume link speed 100 Mbps, service time ~ packet_size_bytes * 8 / link_bps
-        # Then convert to per-second rate mu = 1 / mean_service_time
-        LINK_MBPS = 100
-        link_bps = LINK_MBPS * 1_000_000
-        avg_bits = sum(r.packet_size for r in records_sorted) * 8 / len(records_sorted)
-        mean_service_time = avg_bits / link_bps  # seconds
-        mu_est = 1.0 / mean_service_time if mean_service_time > 0 else 1.0
-
-    return lambda_est, mu_est
+        est.update_records(records)
+    return est.rates(mean_service_time_ms)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _epoch_seconds(ts: datetime) -> float:
+    # Timestamps naive tomados como UTC, igual que la conversión vectorizada de pandas
+    return (ts - _EPOCH).total_seconds()
+
+
+class TrafficTable:
+    """
+    Columnar traffic capture: one NumPy array per field instead of a list of
+    ``TrafficRecord`` objects.
+
+    - ``timestamps``: epoch seconds (float64, naive timestamps taken as UTC)
+    - ``sizes``: packet sizes in bytes (uint32)
+    - ``protocols``: IP protocol numbers (uint8; 6=TCP, 17=UDP)
+
+    Slicing by position or by time range returns views (no copy); boolean masks such
+    as ``protocol_mask`` select with ``where`` (NumPy fancy indexing copies).
+    """
+
+    __slots__ = ("timestamps", "sizes", "protocols", "_sorted")
+
+    def __init__(self, timestamps, sizes, protocols, copy: bool = False):
+        conv = np.array if copy else np.asarray
+        self.timestamps = conv(timestamps, dtype=np.float64)
+        self.sizes = conv(sizes, dtype=np.uint32)
+        self.protocols = conv(protocols, dtype=np.uint8)
+        if not (len(self.timestamps) == len(self.sizes) == len(self.protocols)):
+            raise ValueError("timestamps, sizes y protocols deben tener misma longitud")
+        self._sorted: Optional[bool] = None
+
+    @classmethod
+    def from_records(cls, records: Iterable) -> "TrafficTable":
+        """Adapter from a list of ``TrafficRecord`` (or any objects with the same fields)."""
+        recs = records if isinstance(records, list) else list(records)
+        n = len(recs)
+        return cls(
+            np.fromiter((_epoch_seconds(r.timestamp) for r in recs), dtype=np.float64, count=n),
+            np.fromiter((r.packet_size for r in recs), dtype=np.uint32, count=n),
+            np.fromiter((r.protocol for r in recs), dtype=np.uint8, count=n),
+        )
+
+    def to_records(self) -> List:
+        """Back to ``TrafficRecord`` objects, for code that still expects them."""
+        from .loaders import TrafficRecord
+
+        return [TrafficRecord(_EPOCH + timedelta(microseconds=round(t * 1e6)), s, p)
+                for t, s, p in zip(self.timestamps.tolist(), self.sizes.tolist(), self.protocols.tolist())]
+
+    @classmethod
+    def concat(cls, tables: Iterable["TrafficTable"]) -> "TrafficTable":
+        tables = list(tables)
+        if not tables:
+            return cls.empty()
+        return cls(np.concatenate([t.timestamps for t in tables]),
+                   np.concatenate([t.sizes for t in tables]),
+                   np.concatenate([t.protocols for t in tables]))
+
+    @classmethod
+    def empty(cls) -> "TrafficTable":
+        return cls(np.empty(0), np.empty(0), np.empty(0))
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __repr__(self) -> str:
+        return f"TrafficTable(n={len(self)})"
+
+    def __getitem__(self, idx) -> "TrafficTable":
+        if not isinstance(idx, slice):
+            raise TypeError("TrafficTable solo admite slices; use where() para máscaras")
+        out = TrafficTable(self.timestamps[idx], self.sizes[idx], self.protocols[idx])
+        if self._sorted and (idx.step is None or idx.step > 0):
+            out._sorted = True
+        return out
+
+    @property
+    def is_sorted(self) -> bool:
+        if self._sorted is None:
+            ts = self.timestamps
+            self._sorted = bool(ts.size < 2 or np.all(ts[1:] >= ts[:-1]))
+        return self._sorted
+
+    def sorted(self) -> "TrafficTable":
+        """Table ordered by timestamp (stable); returns self if already ordered."""
+        if self.is_sorted:
+            return self
+        order = np.argsort(self.timestamps, kind='stable')
+        out = TrafficTable(self.timestamps[order], self.sizes[order], self.protocols[order])
+        out._sorted = True
+        return out
+
+    def time_range(self, start: Optional[float] = None, end: Optional[float] = None) -> "TrafficTable":
+        """Packets with start <= t < end as a zero-copy view (the table must be sorted)."""
+        if not self.is_sorted:
+            raise ValueError("time_range requiere una tabla ordenada; use sorted() primero")
+        lo = 0 if start is None else int(np.searchsorted(self.timestamps, start, side='left'))
+        hi = len(self) if end is None else int(np.searchsorted(self.timestamps, end, side='left'))
+        return self[lo:hi]
+
+    def protocol_mask(self, *protocols: int) -> np.ndarray:
+        """Boolean mask of packets whose protocol is any of ``protocols``."""
+        if len(protocols) == 1:
+            return self.protocols == protocols[0]
+        return np.isin(self.protocols, protocols)
+
+    def where(self, mask: np.ndarray) -> "TrafficTable":
+        out = TrafficTable(self.timestamps[mask], self.sizes[mask], self.protocols[mask])
+        if self._sorted:
+            out._sorted = True
+        return out
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from .engine import SimulationResult
+
+# (rho, lambda_eff, busy_fraction, Wq, W, L, Lq, P_K)
+_Metrics = Tuple[float, float, float, float, float, float, float, float]
+
+
+def erlang_c(servers: int, offered: float) -> float:
+    """Probability of waiting in M/M/c with offered load a = lambda/mu (requires a < c)."""
+    # Erlang-B by its stable recursion, then converted to Erlang-C
+    b = 1.0
+    for k in range(1, servers + 1):
+        b = offered * b / (k + offered * b)
+    return servers * b / (servers - offered * (1.0 - b))
+
+
+def _mmc(lam: float, mu: float, c: int) -> Optional[_Metrics]:
+    rho = lam / (c * mu)
+    if rho >= 1.0:
+        return None
+    if c == 1:
+        # L = rho / (1 - rho), Lq = rho^2 / (1 - rho), W = 1 / (mu - lambda), Wq = rho / (mu - lambda)
+        W = 1.0 / (mu - lam)
+        Wq = rho / (mu - lam)
+        return rho, lam, rho, Wq, W, rho / (1.0 - rho), rho * rho / (1.0 - rho), 0.0
+    Lq = erlang_c(c, lam / mu) * rho / (1.0 - rho)
+    Wq = Lq / lam
+    W = Wq + 1.0 / mu
+    return rho, lam, rho, Wq, W, lam * W, Lq, 0.0
+
+
+def _mmck(lam: float, mu: float, c: int, K: int) -> _Metrics:
+    # Birth-death stationary distribution in log space (no factorial/power overflow)
+    logp = [0.0]
+    for n in range(1, K + 1):
+        logp.append(logp[-1] + math.log(lam / (min(n, c) * mu)))
+    top = max(logp)
+    p = [math.exp(x - top) for x in logp]
+    total = math.fsum(p)
+    p = [x / total for x in p]
+    L = math.fsum(n * pn for n, pn in enumerate(p))
+    Lq = math.fsum((n - c) * pn for n, pn in enumerate(p) if n > c)
+    lam_eff = lam * (1.0 - p[K])
+    W = L / lam_eff
+    Wq = Lq / lam_eff
+    busy = (L - Lq) / c
+    return lam / (c * mu), lam_eff, busy, Wq, W, L, Lq, p[K]
+
+
+@lru_cache(maxsize=4096)
+def _solve(lam: float, mu: float, servers: int, capacity: Optional[int]) -> Optional[_Metrics]:
+    if capacity is None:
+        return _mmc(lam, mu, servers)
+    return _mmck(lam, mu, servers, capacity)
+
+
+def solve(arrival_rate: float, service_rate: float, servers: int = 1,
+          capacity: Optional[int] = None) -> Optional[SimulationResult]:
+    """
+    Steady-state metrics of M/M/c (M/M/1 for ``servers=1``) or M/M/c/K with
+    ``capacity`` = K, in the same structure as a simulation run.
+
+    Returns None when there is no steady state (rho >= 1 with an unbounded buffer);
+    callers then fall back to simulation. ``duration`` is infinite, counts are 0,
+    ``lambda_eff`` is the admitted rate (lambda x (1 - P_K) with a finite buffer,
+    as ``QueueSimulator`` reports it), ``blocking_probability`` is P_K and
+    ``busy_fraction`` the mean fraction of busy servers. Results are memoized
+    per parameter tuple in an LRU cache (``cache_info``/``cache_clear``).
+    """
+    if arrival_rate <= 0:
+        raise ValueError("arrival_rate (lambda) must be > 0")
+    if service_rate <= 0:
+        raise ValueError("service_rate (mu) must be > 0")
+    if servers < 1:
+        raise ValueError("servers must be >= 1")
+    if capacity is not None and capacity < servers:
+        raise ValueError("capacity (K) must be >= servers")
+    m = _solve(float(arrival_rate), float(service_rate), int(servers),
+               None if capacity is None else int(capacity))
+    if m is None:
+        return None
+    rho, lam_eff, busy, Wq, W, L, Lq, p_block = m
+    return SimulationResult(
+        duration=math.inf,
+        arrivals=0,
+        departures=0,
+        rho=rho,
+        lambda_eff=lam_eff,
+        mu_eff=float(service_rate),
+        avg_wait_in_queue=Wq,
+        avg_time_in_system=W,
+        L_time_avg=L,
+        Lq_time_avg=Lq,
+        busy_fraction=busy,
+        blocking_probability=p_block,
+    )
+
+
+def cache_info():
+    return _solve.cache_info()
+
+
+def cache_clear() -> None:
+    _solve.cache_clear()
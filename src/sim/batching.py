@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .online_stats import MetricSummary, summarize
+
+# Per-batch sums kept by BatchAccumulator. Customer sums add per departure; the
+# others are increments of the simulator's running totals over the batch.
+_FIELDS = ("customers", "wait", "system", "span", "area_N", "area_Q", "busy", "arrivals", "blocked")
+
+# Metric name -> (numerator, denominator) over the batch sums
+BATCH_METRICS: Dict[str, tuple] = {
+    "Wq": ("wait", "customers"),
+    "W": ("system", "customers"),
+    "L": ("area_N", "span"),
+    "Lq": ("area_Q", "span"),
+}
+
+
+class BatchAccumulator:
+    """
+    Groups measured departures into batches of ``batch_size`` customers and keeps,
+    per batch, the sums needed to rebuild every metric over any run of batches.
+
+    Memory is bounded: once ``max_batches`` batches are stored, adjacent pairs are
+    merged and the batch size doubles, so the stored batches always hold the same
+    number of customers (the open batch is kept apart until it fills).
+    """
+
+    def __init__(self, batch_size: int = 100, max_batches: int = 64):
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        if max_batches < 4 or max_batches % 2:
+            raise ValueError("max_batches must be an even number >= 4")
+        self.batch_size = int(batch_size)
+        self.max_batches = int(max_batches)
+        self.batches: Dict[str, List[float]] = {f: [] for f in _FIELDS}
+        self.start_times: List[float] = []
+        self._open = False
+        self._t0 = 0.0
+        self._marks = (0.0, 0.0, 0.0, 0, 0)  # area_N, area_Q, busy, arrivals, blocked at batch start
+        self._n = 0
+        self._wait = 0.0
+        self._system = 0.0
+
+    def __len__(self) -> int:
+        return len(self.start_times)
+
+    def start(self, t: float, area_N: float = 0.0, area_Q: float = 0.0, busy: float = 0.0,
+              arrivals: int = 0, blocked: int = 0) -> None:
+        """Opens the first batch at time ``t`` with the simulator totals at that instant."""
+        self._open = True
+        self._t0 = t
+        self._marks = (area_N, area_Q, busy, arrivals, blocked)
+        self._n = 0
+        self._wait = 0.0
+        self._system = 0.0
+
+    def add(self, wait: float, system: float, t: float, area_N: float, area_Q: float,
+            busy: float, arrivals: int, blocked: int = 0) -> bool:
+        """Adds one measured departure at ``t``; returns True if it closed a batch."""
+        if not self._open:
+            self.start(t, area_N, area_Q, busy, arrivals, blocked)
+        self._n += 1
+        self._wait += wait
+        self._system += system
+        if self._n < self.batch_size:
+            return False
+
+        a_N, a_Q, b, arr, blk = self._marks
+        rows = self.batches
+        rows["customers"].append(self._n)
+        rows["wait"].append(self._wait)
+        rows["system"].append(self._system)
+        rows["span"].append(t - self._t0)
+        rows["area_N"].append(area_N - a_N)
+        rows["area_Q"].append(area_Q - a_Q)
+        rows["busy"].append(busy - b)
+        rows["arrivals"].append(arrivals - arr)
+        rows["blocked"].append(blocked - blk)
+        self.start_times.append(self._t0)
+        self.start(t, area_N, area_Q, busy, arrivals, blocked)
+        if len(self.start_times) >= self.max_batches:
+            self._coarsen()
+        return True
+
+    def _coarsen(self) -> None:
+        for f, vals in self.batches.items():
+            self.batches[f] = [vals[i] + vals[i + 1] for i in range(0, len(vals) - 1, 2)]
+        self.start_times = self.start_times[0::2][:len(self.batches["customers"])]
+        self.batch_size *= 2
+
+    def means(self, metric: str, first: int = 0) -> List[float]:
+        """Per-batch values of ``metric`` ('Wq', 'W', 'L', 'Lq') for batches ``first``..end."""
+        num, den = BATCH_METRICS[metric]
+        nums = self.batches[num][first:]
+        dens = self.batches[den][first:]
+        return [x / d if d > 0 else float('nan') for x, d in zip(nums, dens)]
+
+    def summary(self, metric: str, confidence: float = 0.95) -> MetricSummary:
+        """Batch-means estimate and Student-t interval for ``metric``."""
+        return summarize(self.means(metric), confidence)
+
+    def precision(self, metrics: Sequence[str], confidence: float = 0.95) -> Dict[str, MetricSummary]:
+        return {m: self.summary(m, confidence) for m in metrics}
+
+    def prefix(self, first: int) -> Dict[str, float]:
+        """Sums of every field over the first ``first`` batches."""
+        return {f: float(sum(vals[:first])) for f, vals in self.batches.items()}
+
+    def mser_truncation(self, metric: str = "W", max_fraction: float = 0.5) -> int:
+        """
+        Number of leading batches to discard by the MSER rule (MSER-5 when batches
+        hold 5 customers): minimizes sum_{j>d} (Y_j - mean_d)^2 / (n - d)^2 over
+        d <= max_fraction * n, where Y are the batch means of ``metric``.
+        """
+        y = np.asarray(self.means(metric), dtype=float)
+        n = y.size
+        if n < 4:
+            return 0
+        # Suffix sums give every candidate's mean and squared deviations in one pass
+        s1 = np.cumsum(y[::-1])[::-1]
+        s2 = np.cumsum((y * y)[::-1])[::-1]
+        d_max = max(1, int(max_fraction * n))
+        d = np.arange(d_max + 1)
+        m = n - d
+        sse = s2[d] - s1[d] * s1[d] / m
+        return int(np.argmin(sse / (m * m)))
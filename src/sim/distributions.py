@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import random
+from typing import Sequence
+
+
+class Distribution:
+    """
+    Base class for inter-arrival / service time distributions used by the simulators.
+
+    Subclasses implement ``sample(rng)`` drawing one value from a ``random.Random``
+    and expose ``mean``; ``rate`` is 1/mean unless overridden.
+    """
+
+    def sample(self, rng: random.Random) -> float:
+        raise NotImplementedError
+
+    @property
+    def mean(self) -> float:
+        raise NotImplementedError
+
+    @property
+    def rate(self) -> float:
+        m = self.mean
+        return 1.0 / m if m > 0 else float('inf')
+
+
+class Exponential(Distribution):
+    """Exponential with rate ``rate`` (the 'M' in M/M/1)."""
+
+    def __init__(self, rate: float):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self._rate = float(rate)
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.expovariate(self._rate)
+
+    @property
+    def mean(self) -> float:
+        return 1.0 / self._rate
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+
+class Deterministic(Distribution):
+    """Constant value (the 'D' in M/D/1)."""
+
+    def __init__(self, value: float):
+        if value < 0:
+            raise ValueError("value must be >= 0")
+        self.value = float(value)
+
+    def sample(self, rng: random.Random) -> float:
+        return self.value
+
+    @property
+    def mean(self) -> float:
+        return self.value
+
+
+class Uniform(Distribution):
+    """Uniform on [low, high]."""
+
+    def __init__(self, low: float, high: float):
+        if low < 0 or high < low:
+            raise ValueError("require 0 <= low <= high")
+        self.low = float(low)
+        self.high = float(high)
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.uniform(self.low, self.high)
+
+    @property
+    def mean(self) -> float:
+        return 0.5 * (self.low + self.high)
+
+
+class Erlang(Distribution):
+    """Erlang-k with rate ``rate`` per phase (mean k/rate, less variable than exponential)."""
+
+    def __init__(self, k: int, rate: float):
+        if k < 1:
+            raise ValueError("k must be >= 1")
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.k = int(k)
+        self.phase_rate = float(rate)
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.gammavariate(self.k, 1.0 / self.phase_rate)
+
+    @property
+    def mean(self) -> float:
+        return self.k / self.phase_rate
+
+
+class Empirical(Distribution):
+    """Resamples uniformly from observed values (e.g. measured service times)."""
+
+    def __init__(self, values: Sequence[float]):
+        if len(values) == 0:
+            raise ValueError("values must not be empty")
+        if min(values) < 0:
+            raise ValueError("values must be >= 0")
+        self.values = [float(v) for v in values]
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.choice(self.values)
+
+    @property
+    def mean(self) -> float:
+        return sum(self.values) / len(self.values)
@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import random
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .batching import BatchAccumulator
+from .distributions import Distribution
+from .online_stats import MetricSummary, OnlineStats
+from .timeline import TimelineRecorder
+
+
+@dataclass
+class SimulationResult:
+    duration: float
+    arrivals: int
+    departures: int
+    rho: Optional[float]
+    lambda_eff: float  # admitted arrival rate (blocked arrivals excluded)
+    mu_eff: Optional[float]
+    avg_wait_in_queue: float
+    avg_time_in_system: float
+    L_time_avg: float
+    Lq_time_avg: float
+    busy_fraction: float
+    timeline: Sequence[Tuple[float, int]] = field(default_factory=list)  # (time, N(t)), a Timeline when recorded
+    blocked: int = 0  # arrivals rejected by a full buffer (finite capacity only)
+    warmup_time: float = 0.0  # truncation actually applied (chosen by MSER with auto_warmup)
+    wait_stats: Optional[OnlineStats] = None  # per-customer Wq: variance, quantiles, histogram
+    system_stats: Optional[OnlineStats] = None  # per-customer W
+    events: int = 0  # arrival and departure events processed
+    precision: Optional[Dict[str, MetricSummary]] = None  # batch-means CIs (sequential stopping)
+    blocking_probability: float = 0.0  # fraction of post-warm-up arrivals blocked (P_K in analytical.solve)
+
+
+# Event kinds; arrivals sort before departures at equal times.
+_ARRIVAL = 0
+_DEPARTURE = 1
+
+
+def _missing_service(rng: random.Random) -> float:
+    raise ValueError("No service time for this job: pass a service distribution")
+
+
+class QueueSimulator:
+    """
+    Discrete-event simulator for a FIFO G/G/c/K queue.
+
+    - Inter-arrival and service times come from pluggable ``Distribution`` objects
+      (``Exponential`` for both gives M/M/c).
+    - ``servers`` identical servers; ``capacity`` bounds the number in system (K),
+      arrivals finding the system full are blocked and counted in ``blocked``; the
+      blocked fraction after warm-up is ``blocking_probability`` and ``lambda_eff`` is
+      the admitted rate over the same window, matching ``analytical.solve`` for M/M/c/K.
+    - Instead of sampling inter-arrivals, ``run`` can replay an ``arrivals`` stream of
+      (time, service time or None) pairs, e.g. a captured trace; a None service time
+      is drawn from ``service``.
+    - Pending events live in a heap ordered by (time, kind, sequence); the waiting
+      line is a deque, so every event costs O(log c) regardless of queue length.
+
+    Metrics follow ``MM1Simulator``: time averages of N(t) and Q(t), empirical
+    means of Wq and W over customers departing after warm-up, and busy_fraction
+    as the mean fraction of busy servers.
+    """
+
+    def __init__(self, interarrival: Optional[Distribution], service: Optional[Distribution], servers: int = 1,
+                 capacity: Optional[int] = None, seed: Optional[int] = None,
+                 rng: Optional[random.Random] = None):
+        if servers < 1:
+            raise ValueError("servers must be >= 1")
+        if capacity is not None and capacity < servers:
+            raise ValueError("capacity (K) must be >= servers")
+        self.interarrival = interarrival
+        self.service = service
+        self.servers = int(servers)
+        self.capacity = capacity
+        self.rng = rng if rng is not None else random.Random(seed)
+
+    def offered_load(self) -> float:
+        """rho = lambda / (c * mu) from the distribution means (NaN if either is not set)."""
+        if self.interarrival is None or self.service is None:
+            return float('nan')
+        return self.interarrival.rate / (self.servers * self.service.rate)
+
+    def default_hist_max(self) -> float:
+        """Histogram range for per-customer times: ~20 mean M/M/1 sojourns at this load."""
+        rho = self.offered_load()
+        if not math.isfinite(rho):
+            raise ValueError("hist_max is required when the offered load is unknown")
+        slack = max(0.01, 1.0 - rho)
+        return 20.0 * self.service.mean / slack
+
+    def run(self, duration: Optional[float] = None, max_arrivals: Optional[int] = None,
+            record_timeline: bool = True, warmup_time: float = 0.0,
+            timeline: Optional[TimelineRecorder] = None, online_stats: bool = False,
+            hist_max: Optional[float] = None, hist_bins: int = 100,
+            precision: Optional[float] = None, precision_metrics: Sequence[str] = ("W", "Wq", "L"),
+            confidence: float = 0.95, max_events: Optional[int] = None,
+            batch_size: int = 100, min_batches: int = 20,
+            auto_warmup: bool = False, mser_batches: int = 1024,
+            arrivals: Optional[Iterable[Tuple[float, Optional[float]]]] = None) -> SimulationResult:
+        """
+        Simulates until ``duration`` or until ``max_arrivals`` customers have been served.
+        With an ``arrivals`` stream (nondecreasing times) the run may also end when the
+        stream is exhausted and the system has emptied; ``rho`` is then left unset.
+
+        With ``record_timeline`` the state N(t) is sampled at every event into
+        ``timeline`` (a default in-memory ``TimelineRecorder`` if not given); pass a
+        configured recorder to decimate or spill long trajectories to disk.
+
+        With ``online_stats`` every measured customer also feeds constant-memory
+        summaries of Wq and W (``wait_stats``/``system_stats``: moments, P² quantiles and
+        a ``hist_bins``-bin histogram on [0, hist_max)).
+
+        Sequential stopping: with ``precision`` (a relative half-width, e.g. 0.05) the
+        measured departures are grouped into batches (see ``BatchAccumulator``) and the
+        run stops as soon as every metric in ``precision_metrics`` ('W', 'Wq', 'L', 'Lq')
+        has a batch-means ``confidence`` interval narrower than ``precision`` x |mean|,
+        using at least ``min_batches`` batches (the accumulator keeps up to
+        max(64, 2 x ``min_batches``) before coarsening). ``max_events`` is a hard budget on
+        processed events in any mode. The achieved intervals go to ``precision``.
+
+        Automatic warm-up: with ``auto_warmup`` ``warmup_time`` is ignored; departures
+        are kept in batches of 5 customers (coarsened to stay within ``mser_batches``)
+        and at the end the MSER rule on the batch means of W picks the truncation
+        point. Wq, W, L, Lq, busy_fraction and the empirical rates then cover only
+        the retained part, and the chosen instant is reported as ``warmup_time``.
+        ``online_stats`` and ``precision`` still describe the whole run.
+        """
+        if (duration is None and max_arrivals is None and arrivals is None
+                and (precision is None or max_events is None)):
+            raise ValueError("Provide duration (seconds) or max_arrivals"
+                             + (" or max_events" if precision is not None else ""))
+        if precision is not None and precision <= 0:
+            raise ValueError("precision must be > 0")
+        if precision is not None and min_batches < 2:
+            raise ValueError("min_batches must be >= 2")
+        if warmup_time < 0 or auto_warmup:
+            warmup_time = 0.0
+
+        if arrivals is None and self.interarrival is None:
+            raise ValueError("Provide an interarrival distribution or an arrivals stream")
+        rng = self.rng
+        source = iter(arrivals) if arrivals is not None else None
+        draw_interarrival = self.interarrival.sample if source is None else None
+        draw_service = self.service.sample if self.service is not None else _missing_service
+        servers = self.servers
+        capacity = self.capacity if self.capacity is not None else math.inf
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        seq = itertools.count()
+
+        # Event calendar: (time, kind, seq, a, b); departures carry the job's arrival
+        # and start times, arrivals a preset service time (or None) in ``a``.
+        events: List[Tuple[float, int, int, Optional[float], float]] = []
+        if source is None:
+            heappush(events, (draw_interarrival(rng), _ARRIVAL, next(seq), None, 0.0))
+        else:
+            first = next(source, None)
+            if first is not None:
+                heappush(events, (float(first[0]), _ARRIVAL, next(seq), first[1], 0.0))
+
+        # State
+        t = 0.0
+        queue: Deque[Tuple[float, Optional[float]]] = deque()  # (arrival time, preset service) waiting
+        busy = 0  # servers currently serving
+
+        # Metrics accumulators
+        last_event_time = 0.0
+        area_N = 0.0  # integral of N(t) after warm-up
+        area_Q = 0.0  # integral of Q(t) after warm-up
+        busy_time = 0.0  # server-seconds busy after warm-up
+
+        total_wait = 0.0
+        total_system = 0.0
+        served = 0
+        served_measured = 0
+        n_arrivals = 0
+        arrivals_measured = 0
+        blocked = 0
+        blocked_measured = 0
+
+        wait_stats: Optional[OnlineStats] = None
+        system_stats: Optional[OnlineStats] = None
+        if online_stats:
+            if hist_max is None:
+                hist_max = self.default_hist_max()
+            wait_stats = OnlineStats(hist_max, hist_bins)
+            system_stats = OnlineStats(hist_max, hist_bins)
+
+        batcher: Optional[BatchAccumulator] = None
+        if precision is not None:
+            # Coarsening leaves max_batches / 2 batches, so keep that >= min_batches
+            batcher = BatchAccumulator(batch_size, max(64, 2 * min_batches))
+            batcher.start(warmup_time)
+        mser: Optional[BatchAccumulator] = None
+        if auto_warmup:
+            mser = BatchAccumulator(5, mser_batches)
+            mser.start(0.0)
+        events_done = 0
+        budget = max_events if max_events is not None else math.inf
+
+        recorder: Optional[TimelineRecorder] = None
+        if record_timeline:
+            recorder = timeline if timeline is not None else TimelineRecorder()
+            record = recorder.record
+
+        while True:
+            if duration is not None and t >= duration:
+                break
+            if max_arrivals is not None and n_arrivals >= max_arrivals and busy == 0 and not queue:
+                # stop once all arrived are served
+                break
+            if not events or events_done >= budget:
+                break
+
+            t_next = events[0][0]
+            if duration is not None and t_next > duration:
+                t_next = duration
+
+            # Time-average integrals, only the part after warm-up counts
+            dt_eff = t_next - (last_event_time if last_event_time > warmup_time else warmup_time)
+            if dt_eff > 0:
+                q_len = len(queue)
+                area_N += (q_len + busy) * dt_eff
+                area_Q += q_len * dt_eff
+                busy_time += busy * dt_eff
+            last_event_time = t_next
+            t = t_next
+
+            if recorder is not None:
+                record(t, len(queue) + busy)
+
+            if duration is not None and t >= duration:
+                # At the horizon; don't process further events
+                continue
+
+            _, kind, _, job_arrival, job_start = heappop(events)
+            events_done += 1
+            if kind == _ARRIVAL:
+                svc = job_arrival
+                n_arrivals += 1
+                full = len(queue) + busy >= capacity
+                if t >= warmup_time and not full:
+                    # Admitted arrivals only: lambda_eff = lambda (1 - P_K), as in analytical.solve
+                    arrivals_measured += 1
+                if full:
+                    blocked += 1
+                    if t >= warmup_time:
+                        blocked_measured += 1
+                elif busy < servers:
+                    busy += 1
+                    heappush(events, (t + (svc if svc is not None else draw_service(rng)),
+                                      _DEPARTURE, next(seq), t, t))
+                else:
+                    queue.append((t, svc))
+                # Once a max_arrivals cap is reached no further arrivals are scheduled
+                capped = max_arrivals is not None and n_arrivals >= max_arrivals
+                if source is None:
+                    next_arrival = t + draw_interarrival(rng)
+                    if not capped:
+                        heappush(events, (next_arrival, _ARRIVAL, next(seq), None, 0.0))
+                elif not capped:
+                    nxt = next(source, None)
+                    if nxt is not None:
+                        if nxt[0] < t:
+                            raise ValueError("arrivals must be in nondecreasing time order")
+                        heappush(events, (float(nxt[0]), _ARRIVAL, next(seq), nxt[1], 0.0))
+            else:
+                served += 1
+                if t >= warmup_time:
+                    wait = job_start - job_arrival
+                    system_time = t - job_arrival
+                    total_wait += wait
+                    total_system += system_time
+                    served_measured += 1
+                    if wait_stats is not None:
+                        wait_stats.add(wait)
+                        system_stats.add(system_time)
+                    if mser is not None:
+                        mser.add(wait, system_time, t, area_N, area_Q, busy_time, arrivals_measured,
+                                 blocked_measured)
+                    if (batcher is not None
+                            and batcher.add(wait, system_time, t, area_N, area_Q, busy_time, arrivals_measured,
+                                           blocked_measured)
+                            and len(batcher) >= min_batches
+                            and all(m.relative_half_width <= precision
+                                    for m in batcher.precision(precision_metrics, confidence).values())):
+                        # Target precision reached: stop right after this departure
+                        break
+                if queue:
+                    arrival_time, svc = queue.popleft()
+                    heappush(events, (t + (svc if svc is not None else draw_service(rng)),
+                                      _DEPARTURE, next(seq), arrival_time, t))
+                else:
+                    busy -= 1
+
+        sim_duration = last_event_time if duration is not None else t
+        if mser is not None:
+            # Drop the leading batches chosen by MSER from every accumulator
+            d = mser.mser_truncation("W")
+            if d > 0:
+                warmup_time = mser.start_times[d]
+                pre = mser.prefix(d)
+                total_wait -= pre["wait"]
+                total_system -= pre["system"]
+                served_measured -= int(pre["customers"])
+                area_N -= pre["area_N"]
+                area_Q -= pre["area_Q"]
+                busy_time -= pre["busy"]
+                arrivals_measured -= int(pre["arrivals"])
+                blocked_measured -= int(pre["blocked"])
+        measured_duration = max(0.0, sim_duration - warmup_time)
+
+        offered_measured = arrivals_measured + blocked_measured
+        lambda_eff = arrivals_measured / measured_duration if measured_duration > 0 else float('nan')
+        mu_eff = (served_measured / busy_time) if busy_time > 0 else None
+        rho_emp = busy_time / (servers * measured_duration) if measured_duration > 0 else None
+
+        avg_wait = (total_wait / served_measured) if served_measured > 0 else 0.0
+        avg_system = (total_system / served_measured) if served_measured > 0 else 0.0
+        L_avg = area_N / measured_duration if measured_duration > 0 else 0.0
+        Lq_avg = area_Q / measured_duration if measured_duration > 0 else 0.0
+
+        return SimulationResult(
+            duration=sim_duration,
+            arrivals=n_arrivals,
+            departures=served,
+            rho=self.offered_load() if source is None else None,
+            lambda_eff=lambda_eff,
+            mu_eff=mu_eff,
+            avg_wait_in_queue=avg_wait,
+            avg_time_in_system=avg_system,
+            L_time_avg=L_avg,
+            Lq_time_avg=Lq_avg,
+            busy_fraction=rho_emp if rho_emp is not None else 0.0,
+            timeline=recorder.finish() if recorder is not None else [],
+            blocked=blocked,
+            blocking_probability=(blocked_measured / offered_measured) if offered_measured else 0.0,
+            warmup_time=warmup_time,
+            wait_stats=wait_stats,
+            system_stats=system_stats,
+            events=events_done,
+            precision=batcher.precision(precision_metrics, confidence) if batcher is not None else None,
+        )
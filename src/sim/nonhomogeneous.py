@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from typing import Callable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+from ..analysis.rate_profile import RateProfile
+from .distributions import Distribution, Exponential
+from .engine import QueueSimulator, SimulationResult
+
+RateFunction = Callable[[np.ndarray], np.ndarray]
+
+
+class ThinningArrivals:
+    """
+    Non-homogeneous Poisson arrivals with rate lambda(t) by thinning (Lewis-Shedler).
+
+    Candidates come from a homogeneous Poisson process at ``rate_max`` >= lambda(t)
+    and each one is kept with probability lambda(t) / rate_max. ``rate`` is a
+    ``RateProfile`` (times relative to its start) or a vectorized callable of time.
+    Yields (time, None) pairs for ``QueueSimulator.run(arrivals=...)``, so service
+    times are drawn from the simulator's service distribution.
+
+    Only [start, end) is generated and times are shifted to start at 0, so a peak
+    hour can be simulated on its own. Candidates are drawn ``chunk_size`` at a time.
+    """
+
+    def __init__(self, rate: Union[RateProfile, RateFunction], start: float = 0.0,
+                 end: Optional[float] = None, rate_max: Optional[float] = None,
+                 seed: Optional[int] = None, chunk_size: int = 65536):
+        if isinstance(rate, RateProfile):
+            if end is None:
+                end = rate.duration
+            if rate_max is None:
+                # Only the windows inside [start, end) matter for the bound
+                w0 = int(np.floor(start / rate.window_seconds))
+                w1 = int(np.ceil(end / rate.window_seconds))
+                sub = rate.rates[max(0, w0):max(0, w1)]
+                rate_max = float(sub.max()) if sub.size else 0.0
+            rate = rate.rate_at
+        if end is None:
+            raise ValueError("end is required when rate is a callable")
+        if rate_max is None:
+            raise ValueError("rate_max is required when rate is a callable")
+        if end <= start:
+            raise ValueError("end must be > start")
+        if rate_max < 0:
+            raise ValueError("rate_max must be >= 0")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be > 0")
+        self.rate = rate
+        self.start = float(start)
+        self.end = float(end)
+        self.rate_max = float(rate_max)
+        self.seed = seed
+        self.chunk_size = chunk_size
+        # Filled while streaming
+        self.candidates = 0
+        self.accepted = 0
+
+    def __iter__(self) -> Iterator[Tuple[float, None]]:
+        if self.rate_max == 0:
+            return
+        rng = np.random.default_rng(self.seed)
+        t = self.start
+        while t < self.end:
+            cand = t + np.cumsum(rng.exponential(1.0 / self.rate_max, size=self.chunk_size))
+            t = float(cand[-1])
+            cand = cand[cand < self.end]
+            lam = np.asarray(self.rate(cand), dtype=float)
+            if np.any(lam > self.rate_max * (1 + 1e-12)):
+                raise ValueError("rate(t) exceeds rate_max; thinning needs an upper bound")
+            keep = cand[rng.random(cand.size) * self.rate_max < lam]
+            self.candidates += cand.size
+            self.accepted += keep.size
+            yield from ((x, None) for x in (keep - self.start).tolist())
+
+
+def simulate_profile(profile: Union[RateProfile, RateFunction], service: Union[Distribution, float],
+                     servers: int = 1, capacity: Optional[int] = None, start: float = 0.0,
+                     end: Optional[float] = None, rate_max: Optional[float] = None,
+                     seed: Optional[int] = None, **run_options) -> SimulationResult:
+    """
+    Queue fed by lambda(t) arrivals (``ThinningArrivals``) over [start, end), e.g.
+    ``start, end = profile.peak(3600)`` for the busiest hour of a day-long profile.
+
+    ``service`` is a ``Distribution`` or a service rate mu (exponential service).
+    Runs until the arrivals end and the queue drains unless ``duration`` or
+    ``max_arrivals`` are given in ``run_options``; ``rho`` is the offered load of
+    the generated arrivals (accepted arrivals x mean service / (servers x span)).
+    The timeline is off unless ``record_timeline=True`` (or a recorder) is passed,
+    so a day-long profile does not keep one sample per event in memory.
+    """
+    run_options.setdefault("record_timeline", False)
+    if not isinstance(service, Distribution):
+        service = Exponential(float(service))
+    arrivals = ThinningArrivals(profile, start, end, rate_max, seed)
+    sim = QueueSimulator(None, service, servers=servers, capacity=capacity, seed=seed)
+    res = sim.run(arrivals=arrivals, **run_options)
+    res.rho = arrivals.accepted * service.mean / (servers * (arrivals.end - arrivals.start))
+    return res
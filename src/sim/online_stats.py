@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+@dataclass
+class MetricSummary:
+    mean: float
+    variance: float  # sample variance of the observations
+    half_width: float  # Student-t confidence half-width
+    ci_low: float
+    ci_high: float
+    n: int  # observations with a finite value
+
+    @property
+    def relative_half_width(self) -> float:
+        """half_width / |mean| (inf when the mean is 0)."""
+        if not math.isfinite(self.half_width):
+            return float('nan')
+        return self.half_width / abs(self.mean) if self.mean != 0 else float('inf')
+
+
+def summarize(values: Sequence[float], confidence: float = 0.95) -> MetricSummary:
+    """Mean, sample variance and Student-t interval of independent observations (NaN/None ignored)."""
+    from scipy.stats import t as student_t
+
+    x = np.array([v for v in values if v is not None], dtype=float)
+    x = x[np.isfinite(x)]
+    n = int(x.size)
+    if n == 0:
+        nan = float('nan')
+        return MetricSummary(nan, nan, nan, nan, nan, 0)
+    mean = float(x.mean())
+    if n < 2:
+        return MetricSummary(mean, float('nan'), float('nan'), float('nan'), float('nan'), n)
+    var = float(x.var(ddof=1))
+    half = float(student_t.ppf(0.5 + confidence / 2.0, n - 1) * math.sqrt(var / n))
+    return MetricSummary(mean, var, half, mean - half, mean + half, n)
+
+
+class Welford:
+    """Running count, mean, variance, min and max (Welford's update, mergeable with Chan's formula)."""
+
+    __slots__ = ("n", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def merge(self, other: "Welford") -> None:
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta * delta * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (n - 1 in the denominator); NaN with fewer than 2 samples."""
+        return self._m2 / (self.n - 1) if self.n > 1 else float('nan')
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance) if self.n > 1 else float('nan')
+
+
+class P2Quantile:
+    """
+    P² streaming estimate of the ``p`` quantile (Jain & Chlamtac, 1985).
+
+    Keeps five markers whose heights are adjusted with a piecewise-parabolic
+    formula, so memory is constant and each update is O(1).
+    """
+
+    __slots__ = ("p", "_q", "_n", "_np", "_dn", "_count")
+
+    def __init__(self, p: float):
+        if not 0 < p < 1:
+            raise ValueError("p must be in (0, 1)")
+        self.p = p
+        self._q: List[float] = []  # marker heights
+        self._n = [0, 1, 2, 3, 4]  # marker positions (0-based)
+        self._np = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]  # desired positions
+        self._dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+        self._count = 0
+
+    def add(self, x: float) -> None:
+        self._count += 1
+        q = self._q
+        if self._count <= 5:
+            q.append(x)
+            if self._count == 5:
+                q.sort()
+            return
+
+        n = self._n
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x < q[1]:
+            k = 0
+        elif x < q[2]:
+            k = 1
+        elif x < q[3]:
+            k = 2
+        elif x <= q[4]:
+            k = 3
+        else:
+            q[4] = x
+            k = 3
+        for i in range(k + 1, 5):
+            n[i] += 1
+        np_ = self._np
+        dn = self._dn
+        for i in range(5):
+            np_[i] += dn[i]
+
+        for i in (1, 2, 3):
+            d = np_[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                s = 1 if d > 0 else -1
+                qp = q[i] + s / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + s * (q[i + s] - q[i]) / (n[i + s] - n[i])
+                q[i] = qp
+                n[i] += s
+
+    def value(self) -> float:
+        if self._count == 0:
+            return float('nan')
+        if self._count < 5:
+            vals = sorted(self._q)
+            return vals[min(len(vals) - 1, int(self.p * len(vals)))]
+        return self._q[2]
+
+
+class FixedHistogram:
+    """Equal-width bins on [low, high) plus underflow/overflow counters."""
+
+    def __init__(self, low: float, high: float, bins: int = 100):
+        if not high > low:
+            raise ValueError("high must be > low")
+        if bins < 1:
+            raise ValueError("bins must be >= 1")
+        self.low = float(low)
+        self.high = float(high)
+        self.bins = int(bins)
+        self._scale = bins / (self.high - self.low)
+        self._counts = [0] * bins
+        self.underflow = 0
+        self.overflow = 0
+
+    def add(self, x: float) -> None:
+        if x < self.low:
+            self.underflow += 1
+        elif x >= self.high:
+            self.overflow += 1
+        else:
+            self._counts[int((x - self.low) * self._scale)] += 1
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.array(self._counts, dtype=np.int64)
+
+    @property
+    def edges(self) -> np.ndarray:
+        return np.linspace(self.low, self.high, self.bins + 1)
+
+    @property
+    def total(self) -> int:
+        return self.underflow + sum(self._counts) + self.overflow
+
+    def quantile(self, p: float) -> float:
+        """Quantile by linear interpolation inside the bin; NaN if it falls outside [low, high)."""
+        total = self.total
+        if total == 0:
+            return float('nan')
+        target = p * total
+        cum = self.underflow
+        if target < cum:
+            return float('nan')
+        width = (self.high - self.low) / self.bins
+        for i, c in enumerate(self._counts):
+            if c and cum + c >= target:
+                return self.low + (i + (target - cum) / c) * width
+            cum += c
+        return float('nan')
+
+
+class OnlineStats:
+    """
+    Constant-memory summary of a stream of per-customer times: Welford moments,
+    one P² estimator per requested quantile and a fixed-bin histogram.
+    """
+
+    DEFAULT_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+    def __init__(self, hist_high: float, hist_bins: int = 100,
+                 quantiles: Sequence[float] = DEFAULT_QUANTILES):
+        self.moments = Welford()
+        self.quantiles: Dict[float, P2Quantile] = {p: P2Quantile(p) for p in quantiles}
+        self.histogram = FixedHistogram(0.0, hist_high, hist_bins)
+
+    def add(self, x: float) -> None:
+        self.moments.add(x)
+        for est in self.quantiles.values():
+            est.add(x)
+        self.histogram.add(x)
+
+    @property
+    def n(self) -> int:
+        return self.moments.n
+
+    @property
+    def mean(self) -> float:
+        return self.moments.mean if self.moments.n else float('nan')
+
+    @property
+    def variance(self) -> float:
+        return self.moments.variance
+
+    def quantile(self, p: float) -> float:
+        """P² estimate if ``p`` is tracked, otherwise interpolated from the histogram."""
+        est: Optional[P2Quantile] = self.quantiles.get(p)
+        return est.value() if est is not None else self.histogram.quantile(p)
+
+    def summary(self) -> Dict[str, float]:
+        out = {
+            "n": self.n,
+            "mean": self.mean,
+            "std": self.moments.std,
+            "min": self.moments.min if self.n else float('nan'),
+            "max": self.moments.max if self.n else float('nan'),
+        }
+        for p, est in self.quantiles.items():
+            out[f"p{p * 100:g}"] = est.value()
+        return out
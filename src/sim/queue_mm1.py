@@ -2,24 +2,38 @@ from __future__ import annotations
 
 import math
 import random
-from dataclasses import dataclass, field
-from typing import List, Optional, Tuple
-
-
-@dataclass
-class SimulationResult:
-    duration: float
-    arrivals: int
-    departures: int
-    rho: Optional[float]
-    lambda_eff: float
-    mu_eff: Optional[float]
-    avg_wait_in_queue: float
-    avg_time_in_system: float
-    L_time_avg: float
-    Lq_time_avg: float
-    busy_fraction: float
-    timeline: List[Tuple[float, int]] = field(default_factory=list)  # (time, N(t))
+from typing import Optional
+
+import numpy as np
+
+from .distributions import Exponential
+from .engine import QueueSimulator, SimulationResult
+
+
+def _lindley_waits(w_prev, s_prev, interarrivals: np.ndarray, services: np.ndarray) -> np.ndarray:
+    """
+    Waits in queue for a block of consecutive FIFO customers via the Lindley recursion
+    Wq[n] = max(0, Wq[n-1] + S[n-1] - A[n]).
+
+    ``w_prev``/``s_prev`` are the wait and service time of the customer preceding the block
+    (0 for an empty system). Operates along the last axis, so a stack of independent
+    queues (one per row) can be solved in one call.
+
+    Unrolled, Wq[n] = X[n] - min(0, min_{k<=n} X[k]) with X the running sum of
+    (S[n-1] - A[n]) started at w_prev, which maps to a cumsum plus a running minimum.
+    """
+    w_prev = np.asarray(w_prev, dtype=float)[..., None]
+    s_prev = np.asarray(s_prev, dtype=float)[..., None]
+    x = np.empty(np.broadcast_shapes(interarrivals.shape, services.shape), dtype=float)
+    x[..., :1] = s_prev
+    x[..., 1:] = services[..., :-1]
+    x -= interarrivals
+    np.cumsum(x, axis=-1, out=x)
+    x += w_prev
+    run_min = np.minimum.accumulate(x, axis=-1)
+    np.minimum(run_min, 0.0, out=run_min)
+    x -= run_min
+    return x
 
 
 class MM1Simulator:
@@ -36,6 +50,10 @@ class MM1Simulator:
     - avg_wait_in_queue (Wq) and avg_time_in_system (W) are empirical means
       over served customers.
     - busy_fraction ~= empirical utilization (rho) over the simulated horizon.
+
+    ``run`` advances event by event on the generic ``QueueSimulator`` core (M/M/1 is
+    its single-server exponential preset); ``run_vectorized`` solves the same FIFO queue in
+    NumPy blocks via the Lindley recursion and is meant for very long runs.
     """
 
     def __init__(self, arrival_rate: float, service_rate: float, seed: Optional[int] = None):
@@ -46,141 +64,123 @@ class MM1Simulator:
         self.lambda_ = float(arrival_rate)
         self.mu = float(service_rate)
         self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
 
     def _exp(self, rate: float) -> float:
         return self.rng.expovariate(rate)
 
     def run(self, duration: Optional[float] = None, max_arrivals: Optional[int] = None,
-            record_timeline: bool = True, warmup_time: float = 0.0) -> SimulationResult:
+            record_timeline: bool = True, warmup_time: float = 0.0, **options) -> SimulationResult:
+        """
+        Event-by-event simulation; ``options`` (timeline recorder, online statistics,
+        sequential stopping, ...) are those of ``QueueSimulator.run``.
+        """
+        engine = QueueSimulator(Exponential(self.lambda_), Exponential(self.mu), servers=1, rng=self.rng)
+        return engine.run(duration=duration, max_arrivals=max_arrivals,
+                          record_timeline=record_timeline, warmup_time=warmup_time, **options)
+
+    def run_vectorized(self, duration: Optional[float] = None, max_arrivals: Optional[int] = None,
+                       warmup_time: float = 0.0, chunk_size: int = 1_000_000) -> SimulationResult:
+        """
+        Block-wise equivalent of ``run`` for the FIFO single-server queue.
+
+        Inter-arrival and service times are drawn ``chunk_size`` at a time from
+        ``self.np_rng``; waits come from the Lindley recursion (see ``_lindley_waits``)
+        and the time averages from clipping each customer's [arrival, start, departure]
+        intervals to the measured window [warmup_time, horizon]. Stopping rules, warm-up
+        handling and the returned fields follow ``run``; no timeline is recorded.
+        Memory is bounded by ``chunk_size`` regardless of the number of customers.
+        """
         if duration is None and max_arrivals is None:
             raise ValueError("Provide duration (seconds) or max_arrivals")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be > 0")
         if warmup_time < 0:
             warmup_time = 0.0
 
-        t = 0.0
-        next_arrival = self._exp(self.lambda_)
-        next_departure = math.inf  # no job in service initially
+        horizon = duration if duration is not None else math.inf
+        rng = self.np_rng
+
+        # Carried state between blocks: last arrival instant, and wait/service/departure
+        # of the last customer (the Lindley recursion only needs the previous one).
+        t_last = 0.0
+        w_prev = 0.0
+        s_prev = 0.0
+        d_last = 0.0
+
+        area_N = 0.0
+        area_Q = 0.0
+        busy_time = 0.0
+        total_wait = 0.0
+        total_system = 0.0
+        served = 0
+        served_measured = 0
+        arrivals = 0
+        arrivals_measured = 0
 
-        # State
-        queue: List[float] = []  # arrival times waiting
-        server_busy = False
-        current_job_arrival: Optional[float] = None
-        current_job_start: Optional[float] = None
-
-        # Metrics accumulators
-        last_event_time = 0.0
-        area_N = 0.0  # integral of N(t) after warm-up
-        area_Q = 0.0  # integral of Q(t) after warm-up
-        busy_time = 0.0  # after warm-up
-
-        total_wait = 0.0  # measured after warm-up
-        total_system = 0.0  # measured after warm-up
-        served = 0  # total served (for info)
-        served_measured = 0  # served after warm-up (for averages)
-        arrivals = 0  # total arrivals
-        arrivals_measured = 0  # arrivals after warm-up (for lambda_eff)
-
-        timeline: List[Tuple[float, int]] = []
-
-        def N_now() -> int:
-            # number in system = queue length + (1 if busy else 0)
-            return len(queue) + (1 if server_busy else 0)
-
-        # Main loop
         while True:
-            if duration is not None and t >= duration:
+            n = chunk_size
+            if max_arrivals is not None:
+                n = min(n, max_arrivals - arrivals)
+            if n <= 0:
                 break
-            if max_arrivals is not None and arrivals >= max_arrivals and not server_busy and len(queue) == 0:
-                # stop once all arrived are served
+
+            gaps = rng.standard_exponential(n)
+            gaps /= self.lambda_
+            services = rng.standard_exponential(n)
+            services /= self.mu
+            arr = np.cumsum(gaps)
+            arr += t_last
+
+            done = False
+            if duration is not None:
+                # Arrivals at or after the horizon never happen
+                cut = int(np.searchsorted(arr, duration, side='left'))
+                if cut < n:
+                    gaps, services, arr = gaps[:cut], services[:cut], arr[:cut]
+                    n = cut
+                    done = True
+            if n == 0:
+                break
+
+            wq = _lindley_waits(w_prev, s_prev, gaps, services)
+            start = arr + wq
+            dep = start + services
+
+            # Time integrals restricted to [warmup_time, horizon]
+            a_c = np.clip(arr, warmup_time, horizon)
+            s_c = np.clip(start, warmup_time, horizon)
+            d_c = np.clip(dep, warmup_time, horizon)
+            area_Q += float(np.sum(s_c - a_c))
+            busy_time += float(np.sum(d_c - s_c))
+            area_N += float(np.sum(d_c - a_c))
+
+            arrivals += n
+            arrivals_measured += int(np.count_nonzero(arr >= warmup_time))
+
+            # Customer averages use departures inside the horizon and after warm-up
+            departed = dep < horizon
+            measured = departed & (dep >= warmup_time)
+            served += int(np.count_nonzero(departed))
+            served_measured += int(np.count_nonzero(measured))
+            total_wait += float(np.sum(wq, where=measured))
+            total_system += float(np.sum(dep - arr, where=measured))
+
+            t_last = float(arr[-1])
+            w_prev = float(wq[-1])
+            s_prev = float(services[-1])
+            d_last = float(dep[-1])
+            if done:
                 break
 
-            # Determine next event time
-            t_next = min(next_arrival, next_departure)
-
-            # Cap by duration if provided
-            if duration is not None and t_next > duration:
-                t_next = duration
-
-            # Update time-average integrals up to t_next, but only part after warm-up
-            dt_total = t_next - last_event_time
-            if dt_total < 0:
-                dt_total = 0.0
-
-            # Portion that counts toward metrics
-            start_eff = max(last_event_time, warmup_time)
-            end_eff = t_next
-            dt_eff = max(0.0, end_eff - start_eff)
-
-            if dt_eff > 0:
-                area_N += N_now() * dt_eff
-                area_Q += len(queue) * dt_eff
-                if server_busy:
-                    busy_time += dt_eff
-            last_event_time = t_next
-            t = t_next
-
-            # Record timeline
-            if record_timeline:
-                timeline.append((t, N_now()))
-
-            # Decide which event fires (if at duration boundary, there may be none)
-            if duration is not None and t >= duration:
-                # At the horizon; don't process further events
-                continue
-
-            if next_arrival <= next_departure:
-                # Arrival event
-                arrivals += 1
-                if t >= warmup_time:
-                    arrivals_measured += 1
-                if not server_busy:
-                    # Start service immediately
-                    server_busy = True
-                    current_job_arrival = t
-                    current_job_start = t
-                    service_time = self._exp(self.mu)
-                    next_departure = t + service_time
-                else:
-                    # join queue
-                    queue.append(t)
-                # Schedule next arrival
-                next_arrival = t + self._exp(self.lambda_)
-
-                # If a max_arrivals cap is set and reached, we won't schedule more arrivals beyond cap
-                if max_arrivals is not None and arrivals >= max_arrivals:
-                    next_arrival = math.inf
-            else:
-                # Departure event
-                served += 1
-                # Compute metrics for the departing job (the one in service)
-                if current_job_arrival is not None and current_job_start is not None:
-                    wait = current_job_start - current_job_arrival
-                    system_time = t - current_job_arrival
-                    if t >= warmup_time:
-                        total_wait += wait
-                        total_system += system_time
-                        served_measured += 1
-
-                # Start next job if any
-                if len(queue) > 0:
-                    arrival_time = queue.pop(0)
-                    current_job_arrival = arrival_time
-                    current_job_start = t
-                    service_time = self._exp(self.mu)
-                    next_departure = t + service_time
-                    # server stays busy
-                else:
-                    # Queue empty: server becomes idle
-                    server_busy = False
-                    current_job_arrival = None
-                    current_job_start = None
-                    next_departure = math.inf
-
-        sim_duration = last_event_time if duration is not None else t
-        # Measured duration excludes warm-up
+        if duration is None:
+            sim_duration = d_last
+        elif max_arrivals is not None and arrivals >= max_arrivals:
+            sim_duration = min(duration, d_last)
+        else:
+            sim_duration = duration
         measured_duration = max(0.0, sim_duration - warmup_time)
 
-        # Empirical rates
         lambda_eff = arrivals_measured / measured_duration if measured_duration > 0 else float('nan')
         mu_eff = (served_measured / busy_time) if busy_time > 0 else None
         rho_emp = busy_time / measured_duration if measured_duration > 0 else None
@@ -190,16 +190,11 @@ class MM1Simulator:
         L_avg = area_N / measured_duration if measured_duration > 0 else 0.0
         Lq_avg = area_Q / measured_duration if measured_duration > 0 else 0.0
 
-        # Theoretical rho may be lambda/mu if stable
-        rho_theo = None
-        if self.mu > 0:
-            rho_theo = self.lambda_ / self.mu
-
         return SimulationResult(
             duration=sim_duration,
             arrivals=arrivals,
             departures=served,
-            rho=rho_theo,
+            rho=self.lambda_ / self.mu,
             lambda_eff=lambda_eff,
             mu_eff=mu_eff,
             avg_wait_in_queue=avg_wait,
@@ -207,5 +202,4 @@ class MM1Simulator:
             L_time_avg=L_avg,
             Lq_time_avg=Lq_avg,
             busy_fraction=rho_emp if rho_emp is not None else 0.0,
-            timeline=timeline,
         )
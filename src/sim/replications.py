@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .engine import SimulationResult
+from .online_stats import MetricSummary, Welford, summarize
+from .queue_mm1 import MM1Simulator
+
+# Scalar SimulationResult fields aggregated across replications; per-run objects
+# (timeline, online stats, precision) are not averaged
+METRICS: Tuple[str, ...] = (
+    "duration",
+    "arrivals",
+    "departures",
+    "lambda_eff",
+    "mu_eff",
+    "avg_wait_in_queue",
+    "avg_time_in_system",
+    "L_time_avg",
+    "Lq_time_avg",
+    "busy_fraction",
+    "blocked",
+    "blocking_probability",
+)
+
+
+@dataclass
+class ReplicationSummary:
+    replications: int
+    confidence: float
+    metrics: Dict[str, MetricSummary]
+    results: List[SimulationResult]
+    wait_moments: Optional[Welford] = None  # pooled per-customer Wq over all runs (online_stats)
+    system_moments: Optional[Welford] = None  # pooled per-customer W
+
+
+def _seed_from(seq: np.random.SeedSequence) -> int:
+    # 128-bit integer seed, valid for both random.Random and numpy's default_rng
+    return int.from_bytes(seq.generate_state(4, dtype=np.uint32).tobytes(), "little")
+
+
+def _run_one(args) -> SimulationResult:
+    arrival_rate, service_rate, seed, vectorized, run_kwargs = args
+    sim = MM1Simulator(arrival_rate, service_rate, seed=seed)
+    if vectorized:
+        return sim.run_vectorized(**run_kwargs)
+    return sim.run(**run_kwargs)
+
+
+def run_replications(arrival_rate: float, service_rate: float, replications: int,
+                     seed: Optional[int] = None, workers: Optional[int] = None,
+                     confidence: float = 0.95, vectorized: bool = False,
+                     **run_kwargs) -> ReplicationSummary:
+    """
+    Runs independent replications of ``MM1Simulator`` over a process pool.
+
+    Each replication gets its own stream spawned from ``numpy.random.SeedSequence(seed)``,
+    so results depend only on ``seed`` and the replication index, never on ``workers``.
+    ``run_kwargs`` go to ``MM1Simulator.run`` (or ``run_vectorized`` when
+    ``vectorized=True``); the timeline is off unless requested explicitly, since it
+    would have to be shipped back from every worker.
+    """
+    if replications < 1:
+        raise ValueError("replications must be >= 1")
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be in (0, 1)")
+    if not vectorized:
+        run_kwargs.setdefault("record_timeline", False)
+
+    seeds = [_seed_from(s) for s in np.random.SeedSequence(seed).spawn(replications)]
+    tasks = [(arrival_rate, service_rate, s, vectorized, run_kwargs) for s in seeds]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, replications))
+    if workers == 1:
+        results = [_run_one(task) for task in tasks]
+    else:
+        # A few tasks per worker per round-trip keeps IPC overhead low while balancing load
+        chunksize = max(1, replications // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_one, tasks, chunksize=chunksize))
+
+    metrics = {
+        name: summarize([getattr(r, name) for r in results], confidence)
+        for name in METRICS
+    }
+    return ReplicationSummary(replications, confidence, metrics, results,
+                              _pooled_moments(results, "wait_stats"),
+                              _pooled_moments(results, "system_stats"))
+
+
+def _pooled_moments(results: List[SimulationResult], attr: str) -> Optional[Welford]:
+    # Merges each run's Welford accumulator (Chan's formula); None without online_stats
+    stats = [getattr(r, attr) for r in results if getattr(r, attr) is not None]
+    if not stats:
+        return None
+    pooled = Welford()
+    for st in stats:
+        pooled.merge(st.moments)
+    return pooled
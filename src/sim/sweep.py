@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .queue_mm1 import _lindley_waits
+
+SWEEP_METRICS: Tuple[str, ...] = (
+    "duration",
+    "avg_wait_in_queue",
+    "avg_time_in_system",
+    "L_time_avg",
+    "Lq_time_avg",
+    "busy_fraction",
+)
+
+
+def _unit_streams(seed: Optional[int]) -> Tuple[np.random.Generator, np.random.Generator]:
+    # Independent unit-exponential streams for inter-arrivals and services; rebuilding
+    # them from the same integer seed gives every block (and every worker) identical
+    # draws, so sweep_mm1 resolves a None seed to fixed entropy before splitting work.
+    ss_a, ss_s = np.random.SeedSequence(seed).spawn(2)
+    return np.random.default_rng(ss_a), np.random.default_rng(ss_s)
+
+
+def _sweep_batch(args) -> np.ndarray:
+    lams, mus, customers, warmup_customers, seed, chunk_size = args
+    lams = np.asarray(lams, dtype=float)
+    mus = np.asarray(mus, dtype=float)
+    m = lams.size
+    lam_col = lams[:, None]
+    mu_col = mus[:, None]
+
+    # Measured window starts at the arrival of the first measured customer. With common
+    # random numbers that instant is one unit-time sum scaled by 1/lambda per point.
+    rng_a, rng_s = _unit_streams(seed)
+    lo = np.zeros(m)
+    if warmup_customers > 0:
+        # Look ahead on the inter-arrival stream, then rewind it for the main pass
+        state = rng_a.bit_generator.state
+        left = warmup_customers + 1
+        unit_lo = 0.0
+        while left > 0:
+            n = min(left, chunk_size)
+            unit_lo += float(rng_a.standard_exponential(n).sum())
+            left -= n
+        rng_a.bit_generator.state = state
+        lo = unit_lo / lams
+    lo_col = lo[:, None]
+
+    t_last = np.zeros(m)
+    w_prev = np.zeros(m)
+    s_prev = np.zeros(m)
+    d_last = np.zeros(m)
+    area_N = np.zeros(m)
+    area_Q = np.zeros(m)
+    busy_time = np.zeros(m)
+    total_wait = np.zeros(m)
+    total_system = np.zeros(m)
+    served_measured = 0
+
+    done = 0
+    while done < customers:
+        n = min(chunk_size, customers - done)
+        gaps = rng_a.standard_exponential(n)[None, :] / lam_col
+        services = rng_s.standard_exponential(n)[None, :] / mu_col
+        arr = np.cumsum(gaps, axis=1)
+        arr += t_last[:, None]
+
+        wq = _lindley_waits(w_prev, s_prev, gaps, services)
+        start = arr + wq
+        dep = start + services
+
+        a_c = np.maximum(arr, lo_col)
+        s_c = np.maximum(start, lo_col)
+        d_c = np.maximum(dep, lo_col)
+        area_Q += (s_c - a_c).sum(axis=1)
+        busy_time += (d_c - s_c).sum(axis=1)
+        area_N += (d_c - a_c).sum(axis=1)
+
+        first = max(0, warmup_customers - done)
+        if first < n:
+            total_wait += wq[:, first:].sum(axis=1)
+            total_system += (dep[:, first:] - arr[:, first:]).sum(axis=1)
+            served_measured += n - first
+
+        t_last = arr[:, -1].copy()
+        w_prev = wq[:, -1].copy()
+        s_prev = services[:, -1].copy()
+        d_last = dep[:, -1].copy()
+        done += n
+
+    measured = np.maximum(d_last - lo, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = np.column_stack([
+            d_last,
+            total_wait / served_measured if served_measured else np.zeros(m),
+            total_system / served_measured if served_measured else np.zeros(m),
+            np.where(measured > 0, area_N / measured, 0.0),
+            np.where(measured > 0, area_Q / measured, 0.0),
+            np.where(measured > 0, busy_time / measured, 0.0),
+        ])
+    return out
+
+
+def sweep_mm1(arrival_rates: Iterable[float], service_rates: Iterable[float],
+              customers: int = 100_000, warmup_customers: int = 0, seed: Optional[int] = None,
+              pairs: bool = False, chunk_size: int = 65_536, max_batch_elements: int = 4_000_000,
+              workers: Optional[int] = 1) -> pd.DataFrame:
+    """
+    Evaluates M/M/1 FIFO metrics over a grid of (lambda, mu) with common random numbers.
+
+    One stream of unit exponentials for inter-arrivals and one for services is drawn
+    from ``seed`` and scaled by 1/lambda and 1/mu at every grid point, so differences
+    between points reflect the rates rather than sampling noise. Each point simulates
+    ``customers`` customers via the Lindley recursion (as ``MM1Simulator.run_vectorized``),
+    discarding the first ``warmup_customers`` from customer averages and measuring time
+    averages from the arrival of the first retained customer.
+
+    By default the grid is the Cartesian product of both rate lists; with ``pairs=True``
+    they are zipped. Points are solved as rows of 2-D blocks of at most
+    ``max_batch_elements`` values, and blocks can be spread over ``workers`` processes
+    (``None`` = all cores). Returns one row per point.
+    """
+    if customers <= 0:
+        raise ValueError("customers must be > 0")
+    if warmup_customers < 0 or warmup_customers >= customers:
+        raise ValueError("warmup_customers must be in [0, customers)")
+    lams_in = [float(x) for x in arrival_rates]
+    mus_in = [float(x) for x in service_rates]
+    if pairs:
+        if len(lams_in) != len(mus_in):
+            raise ValueError("arrival_rates and service_rates must have the same length when pairs=True")
+        grid: List[Tuple[float, float]] = list(zip(lams_in, mus_in))
+    else:
+        grid = list(itertools.product(lams_in, mus_in))
+    if not grid:
+        raise ValueError("Empty (lambda, mu) grid")
+    if any(lam <= 0 or mu <= 0 for lam, mu in grid):
+        raise ValueError("All rates must be > 0")
+
+    lams = np.array([g[0] for g in grid])
+    mus = np.array([g[1] for g in grid])
+    chunk_size = max(1, min(chunk_size, customers))
+    per_batch = max(1, max_batch_elements // chunk_size)
+    # One concrete seed for every block: SeedSequence(None) per task would draw fresh
+    # OS entropy and break common random numbers across blocks and workers
+    seed = np.random.SeedSequence(seed).entropy
+    tasks = [(lams[i:i + per_batch], mus[i:i + per_batch], customers, warmup_customers, seed, chunk_size)
+             for i in range(0, len(grid), per_batch)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+    if workers == 1:
+        blocks: Sequence[np.ndarray] = [_sweep_batch(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            blocks = list(pool.map(_sweep_batch, tasks))
+
+    df = pd.DataFrame(np.vstack(blocks), columns=list(SWEEP_METRICS))
+    df.insert(0, "rho", lams / mus)
+    df.insert(0, "service_rate", mus)
+    df.insert(0, "arrival_rate", lams)
+    df.insert(3, "customers", customers)
+    return df
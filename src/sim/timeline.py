@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import json
+import math
+import shutil
+import tempfile
+import weakref
+from array import array
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+_TIMES_FILE = "times.f64"
+_COUNTS_FILE = "counts.i32"
+_MANIFEST_FILE = "timeline.json"
+
+
+class Timeline(Sequence[Tuple[float, int]]):
+    """
+    Recorded N(t) trajectory as two typed columns: ``times`` (float64) and
+    ``counts`` (int32).
+
+    Behaves like the former list of ``(time, N(t))`` tuples (len, indexing,
+    iteration) while keeping 12 bytes per sample. The columns may be memory-mapped
+    (see ``load``), so very long timelines can be sliced without reading them whole.
+
+    A timeline spilled by ``TimelineRecorder`` into a temporary directory owns it:
+    the directory is removed by ``close`` or once the timeline (and its slices) are
+    garbage collected; ``save`` it elsewhere to keep the data.
+    """
+
+    def __init__(self, times: np.ndarray, counts: np.ndarray, path: Optional[Path] = None):
+        if len(times) != len(counts):
+            raise ValueError("times and counts must have the same length")
+        self.times = times
+        self.counts = counts
+        self.path = path  # directory holding the columns, if disk-backed
+        self._owner: Optional[Timeline] = None  # timeline owning ``path``, kept alive by slices
+        self._cleanup: Optional[weakref.finalize] = None
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            part = Timeline(self.times[idx], self.counts[idx], self.path)
+            part._owner = self._owner if self._owner is not None else self
+            return part
+        return float(self.times[idx]), int(self.counts[idx])
+
+    def __iter__(self) -> Iterator[Tuple[float, int]]:
+        for t, n in zip(self.times.tolist(), self.counts.tolist()):
+            yield t, n
+
+    def __repr__(self) -> str:
+        where = f", path='{self.path}'" if self.path is not None else ""
+        return f"Timeline(len={len(self)}{where})"
+
+    def _own_directory(self) -> None:
+        """Removes ``path`` (a temporary spill directory) when this timeline is collected."""
+        self._cleanup = weakref.finalize(self, shutil.rmtree, str(self.path), True)
+
+    def close(self) -> None:
+        """Deletes the temporary spill directory now; the timeline is unusable afterwards."""
+        owner = self._owner if self._owner is not None else self
+        if owner._cleanup is not None:
+            owner.times = self.times = np.empty(0, dtype=np.float64)
+            owner.counts = self.counts = np.empty(0, dtype=np.int32)
+            owner._cleanup()
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Writes the columns as raw little-endian files plus a small JSON manifest."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        if self.path is not None and len(self) == _manifest_length(self.path):
+            # Already disk-backed and complete: copy the files without loading them
+            if self.path.resolve() != path.resolve():
+                shutil.copyfile(self.path / _TIMES_FILE, path / _TIMES_FILE)
+                shutil.copyfile(self.path / _COUNTS_FILE, path / _COUNTS_FILE)
+        else:
+            np.asarray(self.times, dtype='<f8').tofile(path / _TIMES_FILE)
+            np.asarray(self.counts, dtype='<i4').tofile(path / _COUNTS_FILE)
+        _write_manifest(path, len(self))
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap: bool = True) -> "Timeline":
+        """Opens a saved timeline; with ``mmap`` the columns are read lazily from disk."""
+        path = Path(path)
+        n = _manifest_length(path)
+        if mmap and n > 0:
+            times = np.memmap(path / _TIMES_FILE, dtype='<f8', mode='r', shape=(n,))
+            counts = np.memmap(path / _COUNTS_FILE, dtype='<i4', mode='r', shape=(n,))
+        else:
+            times = np.fromfile(path / _TIMES_FILE, dtype='<f8', count=n)
+            counts = np.fromfile(path / _COUNTS_FILE, dtype='<i4', count=n)
+        return cls(times, counts, path)
+
+
+def _write_manifest(path: Path, length: int) -> None:
+    manifest = {"length": int(length), "times": _TIMES_FILE, "counts": _COUNTS_FILE,
+                "times_dtype": "<f8", "counts_dtype": "<i4"}
+    (path / _MANIFEST_FILE).write_text(json.dumps(manifest), encoding='utf-8')
+
+
+def _manifest_length(path: Path) -> int:
+    try:
+        return int(json.loads((path / _MANIFEST_FILE).read_text(encoding='utf-8'))["length"])
+    except FileNotFoundError:
+        return -1
+
+
+class TimelineRecorder:
+    """
+    Collects (time, N(t)) samples for the simulators into typed arrays.
+
+    - Samples are appended to compact ``array`` buffers and frozen into NumPy chunks
+      of ``chunk_events`` samples.
+    - Once more than ``max_memory_events`` samples are held, everything is spilled to
+      ``spill_dir`` (a temporary directory by default) and later chunks are appended
+      there; ``finish`` then returns a memory-mapped ``Timeline``. A temporary
+      directory is handed over to that timeline, which deletes it when closed or
+      collected; ``close`` (or collecting an unfinished recorder) deletes it otherwise.
+      A caller-provided ``spill_dir`` is never deleted.
+    - Decimation: ``only_changes`` keeps a sample only when N(t) differs from the last
+      kept one; ``sample_dt`` keeps the first sample at or after each multiple of Δt.
+    """
+
+    def __init__(self, chunk_events: int = 1 << 16, max_memory_events: Optional[int] = None,
+                 spill_dir: Optional[Union[str, Path]] = None, only_changes: bool = False,
+                 sample_dt: Optional[float] = None):
+        if chunk_events <= 0:
+            raise ValueError("chunk_events must be > 0")
+        if sample_dt is not None and sample_dt <= 0:
+            raise ValueError("sample_dt must be > 0")
+        self.chunk_events = int(chunk_events)
+        self.max_memory_events = max_memory_events
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self.only_changes = only_changes
+        self.sample_dt = sample_dt
+
+        self._tbuf = array('d')
+        self._nbuf = array('i')
+        self._chunks: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._held = 0  # samples in self._chunks
+        self._spilled = 0  # samples written to disk
+        self._files: Optional[Tuple[BinaryIO, BinaryIO]] = None
+        self._owns_dir = False  # spill_dir created here with mkdtemp
+        self._last_n: Optional[int] = None
+        self._next_sample = -math.inf
+
+        if not only_changes and sample_dt is None:
+            self.record = self._record_all
+
+    def __len__(self) -> int:
+        return self._spilled + self._held + len(self._tbuf)
+
+    def record(self, t: float, n: int) -> None:
+        if self.only_changes:
+            if n == self._last_n:
+                return
+            self._last_n = n
+        if self.sample_dt is not None:
+            if t < self._next_sample:
+                return
+            self._next_sample = (math.floor(t / self.sample_dt) + 1) * self.sample_dt
+        self._record_all(t, n)
+
+    def _record_all(self, t: float, n: int) -> None:
+        self._tbuf.append(t)
+        self._nbuf.append(n)
+        if len(self._tbuf) >= self.chunk_events:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._tbuf:
+            return
+        times = np.frombuffer(self._tbuf, dtype=np.float64)
+        counts = np.frombuffer(self._nbuf, dtype=np.intc).astype(np.int32, copy=False)
+        self._tbuf = array('d')
+        self._nbuf = array('i')
+        self._chunks.append((times, counts))
+        self._held += len(times)
+        if self._files is not None or (self.max_memory_events is not None
+                                       and self._held > self.max_memory_events):
+            self._spill()
+
+    def _spill(self) -> None:
+        if self._files is None:
+            if self.spill_dir is None:
+                self.spill_dir = Path(tempfile.mkdtemp(prefix="timeline_"))
+                self._owns_dir = True
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            self._files = (open(self.spill_dir / _TIMES_FILE, 'wb'),
+                           open(self.spill_dir / _COUNTS_FILE, 'wb'))
+        ft, fn = self._files
+        for times, counts in self._chunks:
+            ft.write(times.astype('<f8', copy=False).tobytes())
+            fn.write(counts.astype('<i4', copy=False).tobytes())
+            self._spilled += len(times)
+        self._chunks = []
+        self._held = 0
+
+    def finish(self) -> Timeline:
+        """Flushes pending samples and returns the recorded ``Timeline``."""
+        self._flush()
+        if self._files is not None:
+            for f in self._files:
+                f.close()
+            self._files = None
+            _write_manifest(self.spill_dir, self._spilled)
+            timeline = Timeline.load(self.spill_dir, mmap=True)
+            if self._owns_dir:
+                timeline._own_directory()
+                self._owns_dir = False
+            return timeline
+        if not self._chunks:
+            return Timeline(np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int32))
+        times = np.concatenate([c[0] for c in self._chunks])
+        counts = np.concatenate([c[1] for c in self._chunks])
+        self._chunks = []
+        self._held = 0
+        return Timeline(times, counts)
+
+    def close(self) -> None:
+        """Closes spill files and deletes a temporary ``spill_dir`` not yet handed to a ``Timeline``."""
+        if self._files is not None:
+            for f in self._files:
+                f.close()
+            self._files = None
+        if self._owns_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self._owns_dir = False
+
+    def __del__(self) -> None:
+        if getattr(self, "_files", None) is not None or getattr(self, "_owns_dir", False):
+            self.close()
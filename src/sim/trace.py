@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import itertools
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+from ..data.loaders import TrafficRecord
+from ..data.table import TrafficTable
+from .engine import QueueSimulator, SimulationResult
+
+
+class TraceArrivals:
+    """
+    Streams (arrival time, service time) pairs from captured ``TrafficRecord``s
+    or a ``TrafficTable``.
+
+    - Times are seconds relative to the first packet, with optional uniform jitter in
+      [0, jitter_seconds] drawn as in ``analysis_cli.py`` (same generator and seed),
+      useful when timestamps only have second/minute resolution.
+    - Service time = packet_size * 8 / link rate, the same model used by
+      ``estimate_rates_from_records`` when no mean service time is given.
+    - Records are consumed ``chunk_size`` at a time and must be ordered by timestamp;
+      jittered packets that could still be overtaken by the next chunk are held back,
+      so memory stays bounded by the chunk size.
+    """
+
+    def __init__(self, records: Union[Iterable[TrafficRecord], TrafficTable], link_mbps: float = 100.0,
+                 jitter_seconds: float = 0.0, seed: Optional[int] = 12345, chunk_size: int = 100_000):
+        if link_mbps <= 0:
+            raise ValueError("link_mbps must be > 0")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be > 0")
+        self.records = records
+        self.link_bps = link_mbps * 1_000_000
+        self.jitter_seconds = max(0.0, jitter_seconds)
+        self.seed = seed
+        self.chunk_size = chunk_size
+        # Filled while streaming
+        self.packets = 0
+        self.total_service = 0.0
+        self.last_arrival = 0.0
+
+    def _chunks(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        # (epoch seconds, packet sizes) per chunk of at most chunk_size packets
+        if isinstance(self.records, TrafficTable):
+            for i in range(0, len(self.records), self.chunk_size):
+                part = self.records[i:i + self.chunk_size]
+                yield part.timestamps, part.sizes.astype(float)
+            return
+        it = iter(self.records)
+        while True:
+            chunk = list(itertools.islice(it, self.chunk_size))
+            if not chunk:
+                return
+            # Same naive-as-UTC epoch as TrafficTable, independent of the host timezone
+            part = TrafficTable.from_records(chunk)
+            yield part.timestamps, part.sizes.astype(float)
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        rng = np.random.default_rng(self.seed) if self.jitter_seconds > 0 else None
+        chunks = self._chunks()
+        origin: Optional[float] = None
+        last_base = -np.inf
+        held_t = np.empty(0)
+        held_s = np.empty(0)
+        while True:
+            chunk = next(chunks, None)
+            final = chunk is None
+            if not final:
+                base, sizes = chunk
+                if origin is None:
+                    origin = float(base[0])
+                base = base - origin
+                if base[0] < last_base or np.any(np.diff(base) < 0):
+                    raise ValueError("Trace records must be ordered by timestamp")
+                last_base = float(base[-1])
+                times = base + rng.uniform(0, self.jitter_seconds, size=len(base)) if rng is not None else base
+                t = np.concatenate((held_t, times))
+                s = np.concatenate((held_s, sizes * 8.0 / self.link_bps))
+                order = np.argsort(t, kind='stable')
+                t, s = t[order], s[order]
+                # Later packets arrive at or after last_base, so only earlier ones are final
+                ready = int(np.searchsorted(t, last_base, side='right'))
+            else:
+                t, s = held_t, held_s
+                ready = len(t)
+            out_t, out_s = t[:ready], s[:ready]
+            held_t, held_s = t[ready:], s[ready:]
+            if ready:
+                self.packets += ready
+                self.total_service += float(out_s.sum())
+                self.last_arrival = float(out_t[-1])
+                yield from zip(out_t.tolist(), out_s.tolist())
+            if final:
+                return
+
+
+def simulate_trace(records: Union[Iterable[TrafficRecord], TrafficTable], link_mbps: float = 100.0, servers: int = 1,
+                   capacity: Optional[int] = None, jitter_seconds: float = 0.0,
+                   seed: Optional[int] = 12345, chunk_size: int = 100_000,
+                   **run_options) -> SimulationResult:
+    """
+    Trace-driven FIFO queue: replays the captured arrival instants and packet sizes
+    (see ``TraceArrivals``) through ``QueueSimulator`` with ``servers`` links of
+    ``link_mbps`` each, keeping burstiness that a single (lambda, mu) pair loses.
+
+    Runs until the trace is exhausted and the queue drains unless ``duration`` or
+    ``max_arrivals`` are given in ``run_options``. ``rho`` is the offered load of
+    the replayed packets (total service time / (servers x last arrival)). The
+    timeline is off unless ``record_timeline=True`` (or a recorder) is passed, so
+    replaying a long capture keeps memory bounded.
+    """
+    run_options.setdefault("record_timeline", False)
+    trace = TraceArrivals(records, link_mbps, jitter_seconds, seed, chunk_size)
+    sim = QueueSimulator(None, None, servers=servers, capacity=capacity)
+    res = sim.run(arrivals=trace, **run_options)
+    if trace.last_arrival > 0:
+        res.rho = trace.total_service / (servers * trace.last_arrival)
+    return res